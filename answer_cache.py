@@ -0,0 +1,182 @@
+import os
+import queue
+from collections import OrderedDict
+
+from fuzzy import NGramIndex, FUZZY_MATCH_THRESHOLD
+from models import *
+from pack import AnswerPack
+
+ANSWER_CACHE_SIZE = int(os.environ.get('ANSWER_CACHE_SIZE', 0)) or None
+# Answers wrong at least this often with a success rate below the cut-off are no longer tried
+ANSWER_PRUNE_FAILURES = int(os.environ.get('ANSWER_PRUNE_FAILURES', 3))
+ANSWER_PRUNE_RATE = float(os.environ.get('ANSWER_PRUNE_RATE', .25))
+# Comma separated answer packs consulted for questions the database does not know
+ANSWER_PACKS = [path for path in os.environ.get('ANSWER_PACKS', '').split(',') if path]
+
+
+class AnswerBroadcast:
+    def __init__(self, inbox, peers):
+        self._inbox = inbox
+        self._peers = peers
+
+    def publish(self, question, answer):
+        for peer in self._peers:
+            peer.put((question, answer))
+
+    def receive(self):
+        while True:
+            try:
+                yield self._inbox.get_nowait()
+            except queue.Empty:
+                return
+
+
+class AnswerCache:
+    def __init__(self, max_size=ANSWER_CACHE_SIZE, broadcast=None, fuzzy_threshold=FUZZY_MATCH_THRESHOLD,
+                 packs=ANSWER_PACKS, service=None):
+        self.max_size = max_size
+        self.broadcast = broadcast
+        self.service = service
+        self.packs = [AnswerPack(path) for path in packs]
+        self.pack_hits = 0
+        self.complete = False
+        self.hits = 0
+        self.misses = 0
+        self.fuzzy_hits = 0
+        self.index = NGramIndex(fuzzy_threshold)
+        self._answers = OrderedDict()
+
+    def __len__(self):
+        return len(self._answers)
+
+    def __contains__(self, question):
+        return normalize_question(question) in self._answers
+
+    @property
+    def _full(self):
+        return self.max_size is not None and len(self._answers) >= self.max_size
+
+    def preload(self):
+        self._answers.clear()
+        self.index.clear()
+        self.complete = True
+        for answer in self._stored_answers():
+            if answer.question_key not in self._answers and self._full:
+                # Keep scanning so questions already cached get all of their answers
+                self.complete = False
+                continue
+            self._answers.setdefault(answer.question_key, []).append(answer)
+        for key in self._answers:
+            self.index.add(key)
+        return len(self._answers)
+
+    def _stored_answers(self):
+        if self.service is not None:
+            rows = self.service.fetch()
+            # Answers uploaded after this point arrive through the delta sync
+            self.service.start()
+            if rows is not None:
+                for answer_id, question, answer, successes, failures in rows:
+                    yield QuestionAnswer(id=answer_id, question=question, answer=answer,
+                                         successes=successes, failures=failures)
+                return
+
+        # No service, or it is down: the local database
+        with Session() as session:
+            yield from session.query(QuestionAnswer).order_by(QuestionAnswer.id).yield_per(1000)
+
+    def _put(self, key, answers):
+        self._answers[key] = answers
+        self._answers.move_to_end(key)
+        self.index.add(key)
+        while self.max_size is not None and len(self._answers) > self.max_size:
+            evicted, _ = self._answers.popitem(last=False)
+            self.index.remove(evicted)
+            self.complete = False
+
+    def get(self, question):
+        for source in (self.broadcast, self.service):
+            if source is None:
+                continue
+            for learned_question, learned_answer in source.receive():
+                self._add(QuestionAnswer(question=learned_question, answer=learned_answer))
+
+        key = normalize_question(question)
+        if (answers := self._answers.get(key)) is not None:
+            self._answers.move_to_end(key)
+            self.hits += 1
+            return self._rank(answers)
+
+        self.misses += 1
+        if not self.complete and (answers := self._load(key)):
+            self._put(key, answers)
+            return self._rank(answers)
+        if answers := self._load_packs(key):
+            self.pack_hits += 1
+            self._put(key, answers)
+            return self._rank(answers)
+        return self.similar(key)
+
+    def _load_packs(self, key):
+        answers = {}
+        for pack in self.packs:
+            for question, answer, successes, failures in pack.get(key):
+                answers.setdefault(answer, QuestionAnswer(question=question, answer=answer,
+                                                          successes=successes, failures=failures))
+        return list(answers.values())
+
+    def similar(self, key):
+        answers = []
+        for similarity, candidate in self.index.search(key):
+            answers.extend(self._rank(self._answers[candidate]))
+        if answers:
+            self.fuzzy_hits += 1
+        return answers
+
+    @staticmethod
+    def _pruned(answer):
+        return answer.failures >= ANSWER_PRUNE_FAILURES and answer.success_rate < ANSWER_PRUNE_RATE
+
+    def _rank(self, answers):
+        return sorted((answer for answer in answers if not self._pruned(answer)),
+                      key=lambda answer: answer.success_rate, reverse=True)
+
+    def record(self, answer, correct):
+        if correct:
+            answer.successes += 1
+        else:
+            answer.failures += 1
+
+    def accuracy(self, question):
+        answers = self._answers.get(normalize_question(question), [])
+        successes = sum(answer.successes for answer in answers)
+        attempts = successes + sum(answer.failures for answer in answers)
+        return successes / attempts if attempts else None
+
+    def _load(self, key):
+        with Session() as session:
+            return session.query(QuestionAnswer).filter(QuestionAnswer.question_key == key).all()
+
+    def add(self, answer):
+        answer = self._add(answer)
+        if self.broadcast is not None:
+            self.broadcast.publish(answer.question, answer.answer)
+        return answer
+
+    def _add(self, answer):
+        key = answer.question_key
+        if (answers := self._answers.get(key)) is None:
+            answers = [] if self.complete else self._load(key)
+        for existing in answers:
+            if existing.answer == answer.answer:
+                answer = existing
+                break
+        else:
+            answers.append(answer)
+        self._put(key, answers)
+        return answer
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
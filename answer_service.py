@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import queue
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import *
+
+ANSWER_SERVICE_URL = os.environ.get('ANSWER_SERVICE_URL', '')
+ANSWER_SERVICE_TIMEOUT = float(os.environ.get('ANSWER_SERVICE_TIMEOUT', 5))
+# Seconds between delta syncs pulling answers other hosts uploaded
+ANSWER_SERVICE_SYNC_INTERVAL = float(os.environ.get('ANSWER_SERVICE_SYNC_INTERVAL', 30))
+# Rows per sync response
+ANSWER_SERVICE_PAGE_SIZE = int(os.environ.get('ANSWER_SERVICE_PAGE_SIZE', 5000))
+ANSWER_SERVICE_HOST = os.environ.get('ANSWER_SERVICE_HOST', '127.0.0.1')
+ANSWER_SERVICE_PORT = int(os.environ.get('ANSWER_SERVICE_PORT', 8765))
+
+
+def _is_text(value):
+    return isinstance(value, str) and bool(value.strip())
+
+
+class AnswerServiceHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/answers':
+            return self._send(404, {"error": "not found"})
+        query = parse_qs(url.query)
+        try:
+            since = int(query.get('since', ['0'])[0])
+            limit = min(int(query.get('limit', [ANSWER_SERVICE_PAGE_SIZE])[0]), ANSWER_SERVICE_PAGE_SIZE)
+        except ValueError:
+            return self._send(400, {"error": "since and limit must be integers"})
+
+        with Session() as session:
+            rows = session.query(QuestionAnswer).filter(QuestionAnswer.id > since) \
+                .order_by(QuestionAnswer.id).limit(limit).all()
+        self._send(200, {"answers": [[row.id, row.question, row.answer, row.successes, row.failures]
+                                     for row in rows]})
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/answers':
+            return self._send(404, {"error": "not found"})
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            if not isinstance(payload, dict):
+                raise TypeError
+            answers = [(question, answer) for question, answer in payload.get('answers', [])]
+            outcomes = [(question, answer, correct) for question, answer, correct in payload.get('outcomes', [])]
+            # Anything else would be stored and break every client that syncs it
+            if not all(_is_text(question) and _is_text(answer) for question, answer, *_ in answers + outcomes):
+                raise ValueError
+            if not all(isinstance(correct, bool) for _, _, correct in outcomes):
+                raise ValueError
+        except (ValueError, TypeError):
+            return self._send(400, {"error": "expected answers and outcomes lists of non-empty texts"})
+
+        try:
+            with Session.begin() as session:
+                written = upsert_answers(session, answers)
+                record_outcomes(session, outcomes)
+        except SQLAlchemyError:
+            # The client keeps the batch and retries
+            return self._send(503, {"error": "database unavailable"})
+        self._send(200, {"written": written})
+
+
+class AnswerServiceClient:
+    def __init__(self, url=ANSWER_SERVICE_URL, timeout=ANSWER_SERVICE_TIMEOUT,
+                 sync_interval=ANSWER_SERVICE_SYNC_INTERVAL, page_size=ANSWER_SERVICE_PAGE_SIZE):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.sync_interval = sync_interval
+        self.page_size = page_size
+
+        self.last_id = 0
+        self.synced = 0
+        self.uploaded = 0
+        self.errors = 0
+
+        # requests sessions are not thread safe, the sync thread and the answer writer get one each
+        self._local = threading.local()
+        self._sessions = []
+        self._received = queue.Queue()
+        self._closed = threading.Event()
+        self._thread = None
+
+    @property
+    def _session(self):
+        if (session := getattr(self._local, 'session', None)) is None:
+            session = self._local.session = requests.Session()
+            self._sessions.append(session)
+        return session
+
+    def _request(self, method, **kwargs):
+        try:
+            response = self._session.request(method, f"{self.url}/answers", timeout=self.timeout, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError):
+            self.errors += 1
+            return None
+
+    def fetch(self, since=0):
+        rows = []
+        while True:
+            if (response := self._request('GET', params={'since': since, 'limit': self.page_size})) is None:
+                return None
+            page = response["answers"]
+            rows += page
+            if len(page) < self.page_size:
+                break
+            since = page[-1][0]
+        if rows:
+            self.last_id = max(self.last_id, rows[-1][0])
+        return rows
+
+    def push(self, answers, outcomes):
+        response = self._request('POST', json={"answers": [list(pair) for pair in answers],
+                                               "outcomes": [list(outcome) for outcome in outcomes]})
+        if response is None:
+            return False
+        self.uploaded += len(answers) + len(outcomes)
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="answer-sync", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed.wait(self.sync_interval):
+            # Only rows added since the last sync, outcome counts are refreshed by the next preload
+            for answer_id, question, answer, successes, failures in self.fetch(self.last_id) or ():
+                self._received.put((question, answer))
+                self.synced += 1
+
+    def receive(self):
+        while True:
+            try:
+                yield self._received.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self):
+        self._closed.set()
+        for session in self._sessions:
+            session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the question_answers table to solvers on other hosts")
+    parser.add_argument('--host', default=ANSWER_SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=ANSWER_SERVICE_PORT)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), AnswerServiceHandler)
+    print(f"Serving answers on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
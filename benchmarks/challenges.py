@@ -0,0 +1,123 @@
+import argparse
+import json
+import sys
+import tempfile
+
+from benchmarks.server import serve, isolate_environment
+
+# fixture -> answer stored for the question the solver extracts from it
+FIXTURES = {
+    'assist': "my cat",
+    'select': "みず",
+    'translate': "I am a student",
+    'listenTap': None,
+}
+PHASES = ('get_challenge_info', 'solve_challenge', 'try_answer')
+# 'network' is script extraction with texts from the recorded session payload
+EXTRACTION_MODES = ('script', 'dom', 'network')
+
+
+def seed_answer(duolingo, info, answer):
+    from models import QuestionAnswer
+
+    duolingo.answers.add(QuestionAnswer(question=info["question"], answer=answer))
+
+
+def run_scenario(solver, duolingo, network, url, answer, mode, iterations):
+    from metrics import percentile
+
+    solver.EXTRACTION_MODE = 'script' if mode == 'network' else mode
+    duolingo.network = network if mode == 'network' else None
+    if mode == 'network':
+        url = f"{url}?session"
+    duolingo.redirect(url)
+    if answer is not None:
+        seed_answer(duolingo, duolingo.get_challenge_info(), answer)
+
+    duolingo.metrics.phases.clear()
+    for _ in range(iterations):
+        duolingo.redirect(url)
+        info = duolingo.get_challenge_info()
+        if not duolingo.solve_challenge(info):
+            raise RuntimeError(f"{url} was not solved in {mode} mode")
+
+    return {
+        name: {
+            "count": phase.count,
+            "p50_ms": percentile(phase.samples, .5) * 1000,
+            "p95_ms": percentile(phase.samples, .95) * 1000,
+            "webdriver_commands": phase.webdriver_commands / phase.count,
+        }
+        for name, phase in duolingo.metrics.phases.items() if name in PHASES
+    }
+
+
+def run(iterations, fixtures=FIXTURES):
+    directory = tempfile.mkdtemp(prefix="duolingo-bench-")
+    isolate_environment(directory)
+    import main as solver
+
+    server, base_url = serve()
+    duolingo = solver.Duolingo(status_sink='null', cookies_path=f"{directory}/cookies.json", browser_profile='lean',
+                               challenge_source='network')
+    network = duolingo.network
+    results = {}
+    try:
+        for fixture, answer in fixtures.items():
+            for mode in EXTRACTION_MODES:
+                results[f"{fixture}/{mode}"] = run_scenario(
+                    solver, duolingo, network, f"{base_url}/{fixture}.html", answer, mode, iterations)
+    finally:
+        duolingo.driver.quit()
+        server.shutdown()
+    return results
+
+
+def report(results):
+    print(f"{'scenario':<22}{'phase':<22}{'p50 ms':>10}{'p95 ms':>10}{'wd cmds':>10}")
+    for scenario, phases in results.items():
+        for name, phase in phases.items():
+            print(f"{scenario:<22}{name:<22}{phase['p50_ms']:>10.1f}{phase['p95_ms']:>10.1f}"
+                  f"{phase['webdriver_commands']:>10.1f}")
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for scenario, phases in baseline.items():
+        for name, expected in phases.items():
+            if (actual := results.get(scenario, {}).get(name)) is None:
+                continue
+            if actual["webdriver_commands"] > expected["webdriver_commands"]:
+                found.append(f"{scenario} {name}: {expected['webdriver_commands']:.1f} -> "
+                             f"{actual['webdriver_commands']:.1f} WebDriver commands")
+            if actual["p50_ms"] > expected["p50_ms"] * (1 + tolerance):
+                found.append(f"{scenario} {name}: p50 {expected['p50_ms']:.1f} -> {actual['p50_ms']:.1f} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the extraction and solving hot paths against local "
+                                                 "challenge fixtures (run as python -m benchmarks.challenges)")
+    parser.add_argument('-n', '--iterations', type=int, default=20)
+    parser.add_argument('--save', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="fail when results regress against this JSON file")
+    parser.add_argument('--tolerance', type=float, default=.25, help="allowed relative p50 slowdown")
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    report(results)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        if found := regressions(results, baseline, args.tolerance):
+            print("\n".join(["Regressions:", *found]))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+// Minimal page behaviour the solver relies on: selectable choices, a word bank and the player buttons
+const params = new URLSearchParams(location.search);
+
+if (params.has('session')) {
+    // Recorded session payload, picked up by the network challenge source
+    fetch('/2017-06-30/sessions');
+}
+
+if (params.has('hearts')) {
+    const hearts = document.getElementById('hearts');
+    hearts.innerHTML = '<img src="/images/hearts.svg"><span>' + params.get('hearts') + '</span>';
+}
+
+document.querySelectorAll('[data-test="challenge-choice"]').forEach((choice) => {
+    choice.addEventListener('click', () => {
+        document.querySelectorAll('[data-test="challenge-choice"]')
+            .forEach((other) => other.setAttribute('aria-checked', 'false'));
+        choice.setAttribute('aria-checked', 'true');
+        document.querySelector('[data-test="player-next"]').disabled = false;
+    });
+});
+
+const answer = document.querySelector('.answer-parts');
+document.querySelectorAll('[data-test="word-bank"] > div').forEach((part) => {
+    part.addEventListener('click', () => {
+        if (part.dataset.used) return;
+        part.dataset.used = 'true';
+        const tile = document.createElement('span');
+        tile.textContent = part.innerText.trim();
+        answer.appendChild(tile);
+        document.querySelector('[data-test="player-next"]').disabled = false;
+    });
+});
+
+const correct = () => {
+    const choice = document.querySelector('[data-test="challenge-choice"][aria-checked="true"]');
+    if (choice) return choice.hasAttribute('data-correct');
+    const bank = document.querySelector('[data-test="word-bank"]');
+    return !!bank && answer.innerText.replace(/\s+/g, ' ').trim() === bank.dataset.answer;
+};
+
+const next = document.querySelector('[data-test="player-next"]');
+next.addEventListener('click', () => {
+    const blame = document.querySelector('[data-test*="blame"]');
+    if (blame) {
+        blame.remove();
+        document.querySelector('[data-test="challenge-header"]').replaceWith(
+            document.querySelector('[data-test="challenge-header"]').cloneNode(true));
+        return;
+    }
+    const banner = document.createElement('div');
+    banner.setAttribute('data-test', correct() ? 'blame blame-correct' : 'blame blame-incorrect');
+    banner.textContent = correct() ? 'Nice!' : 'Incorrect';
+    document.body.appendChild(banner);
+});
+
+const skip = document.querySelector('[data-test="player-skip"]');
+skip.addEventListener('click', () => {
+    document.body.dataset.skipped = 'true';
+});
@@ -0,0 +1,28 @@
+import os
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory=FIXTURES_DIR, handler=QuietHandler):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(handler, directory=directory))
+    threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def isolate_environment(directory):
+    # Must run before main/models are imported, they read the environment at import time
+    os.environ['DATABASE_CONNECTION_STRING'] = f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+    os.environ['WEBHOOK_NEED_ANSWER'] = ''
+    os.environ['METRICS_JSONL_PATH'] = ''
+    os.environ['METRICS_PROMETHEUS_PATH'] = ''
+    os.environ['STATUS_SINK'] = 'null'
+    os.environ['BROWSER_PROFILE'] = 'lean'
+    os.environ['PREVIEW_DELAY'] = '0'
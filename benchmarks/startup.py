@@ -0,0 +1,99 @@
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.server import serve, isolate_environment
+
+STAGES = ('import', 'construct', 'first_challenge')
+
+
+def measure(url):
+    # One cold start, run in a fresh interpreter so import costs are paid again
+    directory = tempfile.mkdtemp(prefix="duolingo-startup-")
+    isolate_environment(directory)
+
+    start = time.perf_counter()
+    import main as solver
+    imported = time.perf_counter()
+
+    duolingo = solver.Duolingo(status_sink='null', cookies_path=f"{directory}/cookies.json", browser_profile='lean')
+    constructed = time.perf_counter()
+
+    try:
+        duolingo.redirect(url)
+        duolingo.get_challenge_info()
+        first_challenge = time.perf_counter()
+    finally:
+        duolingo.driver.quit()
+
+    return {
+        "import": imported - start,
+        "construct": constructed - imported,
+        "first_challenge": first_challenge - constructed,
+        "total": first_challenge - start,
+    }
+
+
+def run(iterations, fixture='assist'):
+    from metrics import percentile
+
+    server, base_url = serve()
+    samples = []
+    try:
+        for _ in range(iterations):
+            output = subprocess.run([sys.executable, '-m', 'benchmarks.startup', '--child', f"{base_url}/{fixture}.html"],
+                                    check=True, capture_output=True, text=True).stdout
+            samples.append(json.loads(output.splitlines()[-1]))
+    finally:
+        server.shutdown()
+
+    return {
+        stage: {
+            "p50_ms": percentile([sample[stage] for sample in samples], .5) * 1000,
+            "max_ms": max(sample[stage] for sample in samples) * 1000,
+        }
+        for stage in (*STAGES, 'total')
+    }
+
+
+def report(results):
+    print(f"{'stage':<22}{'p50 ms':>10}{'max ms':>10}")
+    for stage, result in results.items():
+        print(f"{stage:<22}{result['p50_ms']:>10.1f}{result['max_ms']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold start up to the first extracted challenge "
+                                                 "(run as python -m benchmarks.startup)")
+    parser.add_argument('-n', '--iterations', type=int, default=5)
+    parser.add_argument('--save', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="fail when time to first challenge regresses against this JSON file")
+    parser.add_argument('--tolerance', type=float, default=.25, help="allowed relative p50 slowdown")
+    parser.add_argument('--child', metavar='URL', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child)))
+        return
+
+    results = run(args.iterations)
+    report(results)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        expected, actual = baseline['total']['p50_ms'], results['total']['p50_ms']
+        if actual > expected * (1 + args.tolerance):
+            print(f"Regression: time to first challenge {expected:.1f} -> {actual:.1f} ms")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+
+from selenium.webdriver.chrome.options import Options
+
+BROWSER_PROFILE = os.environ.get('BROWSER_PROFILE', 'full')
+BROWSER_WINDOW_SIZE = os.environ.get('BROWSER_WINDOW_SIZE', '1280,900')
+BROWSER_CACHE_DIR = os.environ.get('BROWSER_CACHE_DIR', '.browser-cache')
+BROWSER_USER_DATA_DIR = os.environ.get('BROWSER_USER_DATA_DIR') or None
+
+# Challenges only need the page scripts, styles and API calls; the DOM attributes the solver
+# reads (e.g. the hearts image src) are still there when the resources behind them are blocked
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*.mp3', '*.mp4', '*.ogg', '*.webm', '*.wav', '*.m4a',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*adservice.google.*', '*facebook.net*', '*connect.facebook.*', '*branch.io*', '*sentry.io*',
+    '*cookielaw.org*', '*onetrust.com*', '*fundingchoicesmessages.google.com*',
+]
+
+
+def build_options(profile=BROWSER_PROFILE, user_data_dir=BROWSER_USER_DATA_DIR, performance_log=False,
+                  cache_dir=BROWSER_CACHE_DIR):
+    options = Options()
+    options.add_argument("--mute-audio")
+    if performance_log:
+        # Network events of the page, read back through driver.get_log('performance')
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    if user_data_dir:
+        options.add_argument(f"--user-data-dir={os.path.abspath(user_data_dir)}")
+
+    if profile == 'lean':
+        options.add_argument("--headless=new")
+        options.add_argument(f"--window-size={BROWSER_WINDOW_SIZE}")
+        options.add_argument(f"--disk-cache-dir={os.path.abspath(cache_dir)}")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--autoplay-policy=user-gesture-required")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-background-networking")
+        options.add_argument("--disable-component-update")
+        options.add_argument("--disable-default-apps")
+        options.add_argument("--disable-sync")
+        options.add_argument("--no-first-run")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+
+    return options
+
+
+def apply_resource_blocking(driver):
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
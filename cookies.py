@@ -0,0 +1,84 @@
+import json
+import os
+import pickle
+
+from selenium.common import WebDriverException
+
+CDP_COOKIE_FIELDS = {
+    'name': 'name',
+    'value': 'value',
+    'domain': 'domain',
+    'path': 'path',
+    'secure': 'secure',
+    'httpOnly': 'httpOnly',
+    'sameSite': 'sameSite',
+    'expiry': 'expires',
+}
+
+
+def fingerprint(cookies):
+    # Expiry moves on every request for some cookies, only identity and value matter
+    return sorted((cookie.get('domain', ''), cookie.get('path', ''), cookie['name'], cookie['value'])
+                  for cookie in cookies)
+
+
+class CookieStore:
+    def __init__(self, path):
+        self.path = path
+        self.saves = 0
+        self._fingerprint = None
+
+    @property
+    def legacy_path(self):
+        return f"{os.path.splitext(self.path)[0]}.pkl"
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as file:
+                cookies = json.load(file)
+        elif os.path.exists(self.legacy_path):
+            with open(self.legacy_path, 'rb') as file:
+                cookies = pickle.load(file)
+        else:
+            return []
+
+        self._fingerprint = fingerprint(cookies)
+        return cookies
+
+    def restore(self, driver, cookies=None):
+        if cookies is None:
+            cookies = self.load()
+        if not cookies:
+            return 0
+
+        parameters = [
+            {cdp_field: cookie[field] for field, cdp_field in CDP_COOKIE_FIELDS.items() if field in cookie}
+            for cookie in cookies
+        ]
+        driver.execute_cdp_cmd('Network.setCookies', {'cookies': parameters})
+        return len(cookies)
+
+    def save_if_changed(self, cookies):
+        if (current := fingerprint(cookies)) == self._fingerprint:
+            return False
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(cookies, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.path)
+
+        self._fingerprint = current
+        self.saves += 1
+        return True
+
+
+def restore_one_by_one(driver, cookies):
+    for cookie in cookies:
+        try:
+            driver.add_cookie(cookie)
+        except WebDriverException:
+            pass
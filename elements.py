@@ -0,0 +1,47 @@
+from functools import wraps
+
+from selenium.common import StaleElementReferenceException
+
+
+def refresh_on_stale(func):
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return func(self, *args, **kwargs)
+        except StaleElementReferenceException:
+            # The page re-rendered the challenge, resolve everything again once
+            self.elements.invalidate()
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+class ChallengeElements:
+    def __init__(self):
+        self.header = None
+        self.hits = 0
+        self.misses = 0
+        self._elements = {}
+
+    def invalidate(self):
+        self.header = None
+        self._elements.clear()
+
+    def get(self, header, name, resolve):
+        # A new challenge renders a new header element, which drops everything resolved for the old one
+        if self.header is None or self.header.id != header.id:
+            self.invalidate()
+            self.header = header
+
+        if name in self._elements:
+            self.hits += 1
+            return self._elements[name]
+
+        self.misses += 1
+        self._elements[name] = element = resolve(header)
+        return element
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
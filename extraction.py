@@ -0,0 +1,61 @@
+import os
+
+EXTRACTION_MODE = os.environ.get('EXTRACTION_MODE', 'script')
+
+# Mirrors the DOM walk of Duolingo.get_challenge_info in a single execute_script round trip.
+# arguments[0] is the colour applied to the challenge container the first time it is seen.
+CHALLENGE_INFO_SCRIPT = """
+const color = arguments[0];
+const text = (element) => element ? element.innerText.trim() : '';
+const child = (element, index) => element ? element.children[index] || null : null;
+const getText = (element) => {
+    if (!element) return '';
+    return Array.from(element.querySelectorAll('[lang]'))
+        .filter((node) => ['en', 'ja'].includes(node.getAttribute('lang')) &&
+            !node.querySelector('ruby') && !node.querySelector('[lang]'))
+        .map(text)
+        .join('');
+};
+
+const header = document.querySelector('[data-test="challenge-header"]');
+if (!header) return null;
+const root = header.parentElement && header.parentElement.parentElement && header.parentElement.parentElement.parentElement;
+if (!root) return null;
+const main = root.querySelector('div');
+const container = child(main, 1);
+if (!container) return null;
+
+if (!container.hasAttribute('modified')) {
+    container.setAttribute('modified', '');
+    container.style.backgroundColor = color;
+    container.style.borderRadius = '10px';
+}
+
+const info = {
+    header: text(header.querySelector('span')),
+    type: root.getAttribute('data-test').trim().split(/\\s+/).pop(),
+};
+
+if (['challenge-assist', 'challenge-translate'].includes(info.type)) {
+    info.question = getText(child(container, 0));
+} else {
+    info.question = info.header;
+}
+
+if (info.type === 'challenge-assist' || info.type === 'challenge-select') {
+    const choices = Array.from(container.querySelectorAll('[data-test="challenge-choice"]'));
+    info._options = choices;
+    info.options = choices.map((choice) =>
+        getText(info.type === 'challenge-assist' ? child(child(choice, 1), 0) : child(choice, 1)));
+} else if (info.type === 'challenge-translate') {
+    const bank = child(container, 1) && child(container, 1).querySelector('[data-test="word-bank"]');
+    const parts = bank ? Array.from(bank.querySelectorAll('div')) : [];
+    info._parts = parts;
+    info.parts = parts.map((part) => {
+        const node = child(child(child(child(part, 0), 0), 1), 0);
+        return text(node).includes('\\n') ? getText(node) : text(node);
+    });
+}
+
+return info;
+"""
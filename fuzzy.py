@@ -0,0 +1,86 @@
+import math
+import os
+from collections import Counter
+
+# Share of the smaller key's n-grams found in the other one. Furigana and one character typo pairs
+# score .75 to .91, sentences only sharing a frame like わたしは学生です and あなたは学生です stay near .55
+FUZZY_MATCH_THRESHOLD = float(os.environ.get('FUZZY_MATCH_THRESHOLD', .75))
+FUZZY_MATCH_LIMIT = int(os.environ.get('FUZZY_MATCH_LIMIT', 5))
+# A short key is contained in too many long ones, their n-gram counts may differ this much at most
+FUZZY_LENGTH_RATIO = float(os.environ.get('FUZZY_LENGTH_RATIO', .5))
+NGRAM_SIZE = 3
+# Kana and kanji carry a syllable or a word each, trigrams of them rarely survive a missing character
+CJK_NGRAM_SIZE = 2
+
+
+def _is_cjk(char):
+    return '\u3040' <= char <= '\u30ff' or '\u3400' <= char <= '\u9fff' or '\uac00' <= char <= '\ud7af'
+
+
+def ngrams(key, size=None):
+    # Spaces are dropped so whitespace and furigana extraction differences do not matter
+    key = key.replace(' ', '')
+    if size is None:
+        size = CJK_NGRAM_SIZE if any(_is_cjk(char) for char in key) else NGRAM_SIZE
+    text = f"^{key}$"
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class NGramIndex:
+    def __init__(self, threshold=FUZZY_MATCH_THRESHOLD, limit=FUZZY_MATCH_LIMIT, length_ratio=FUZZY_LENGTH_RATIO):
+        self.threshold = threshold
+        self.limit = limit
+        self.length_ratio = length_ratio
+        # Only each key's n-gram count is kept, its n-grams are rebuilt from the key when needed
+        self._sizes = {}
+        self._postings = {}
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def add(self, key):
+        if key in self._sizes:
+            return
+        grams = ngrams(key)
+        self._sizes[key] = len(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        if self._sizes.pop(key, None) is None:
+            return
+        for gram in ngrams(key):
+            postings = self._postings[gram]
+            postings.discard(key)
+            if not postings:
+                del self._postings[gram]
+
+    def clear(self):
+        self._sizes.clear()
+        self._postings.clear()
+
+    def search(self, key):
+        postings = [self._postings.get(gram, set()) for gram in ngrams(key)]
+        postings.sort(key=len)
+        # A match shares at least this many n-grams, so it is in one of the rarest len - needed + 1 of them
+        # and the long postings of common n-grams are only looked up, never walked
+        needed = max(1, math.ceil(self.threshold * self.length_ratio * len(postings) - 1e-9))
+        rare, common = postings[:len(postings) - needed + 1], postings[len(postings) - needed + 1:]
+        shared = Counter()
+        for keys in rare:
+            shared.update(keys)
+
+        matches = []
+        for candidate, count in shared.items():
+            shorter, longer = sorted((len(postings), self._sizes[candidate]))
+            if shorter < longer * self.length_ratio or count + len(common) < self.threshold * shorter:
+                continue
+            count += sum(candidate in keys for keys in common)
+            # Overlap coefficient, an inserted or dropped reading costs the shorter key nothing
+            similarity = count / shorter
+            if similarity >= self.threshold:
+                matches.append((similarity, candidate))
+        matches.sort(reverse=True)
+        return matches[:self.limit]
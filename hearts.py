@@ -0,0 +1,47 @@
+from selenium.common import WebDriverException
+
+HEARTS_SCRIPT = """
+const image = document.querySelector('[src*="hearts"]');
+let sibling = image && image.nextElementSibling;
+while (sibling && sibling.tagName !== 'SPAN') sibling = sibling.nextElementSibling;
+const hearts = sibling ? parseInt(sibling.innerText, 10) : NaN;
+return Number.isNaN(hearts) ? null : hearts;
+"""
+
+
+class HeartTracker:
+    def __init__(self, driver=None):
+        self.driver = driver
+        self.page = None
+        self.last = -1
+        self.refreshes = 0
+        self.reads = 0
+        self._stale = True
+
+    def invalidate(self):
+        self._stale = True
+
+    def refresh(self):
+        self._stale = False
+        if self.driver is None:
+            return self.page
+
+        self.refreshes += 1
+        try:
+            self.page = self.driver.execute_script(HEARTS_SCRIPT)
+        except WebDriverException:
+            self.page = None
+        if self.page is not None:
+            self.last = self.page
+        return self.page
+
+    def on_page(self):
+        self.reads += 1
+        if self._stale:
+            self.refresh()
+        return self.page
+
+    @property
+    def count(self):
+        self.on_page()
+        return self.last
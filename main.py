@@ -1,28 +1,48 @@
 import atexit
-import json
 import os
-import pickle
 import random
+import threading
 import time
-import tkinter as tk
+from collections import Counter
 
-import pyautogui
-import requests
 from selenium import webdriver
 from selenium.common import NoSuchElementException, TimeoutException, StaleElementReferenceException, \
-    ElementClickInterceptedException
+    ElementClickInterceptedException, JavascriptException, WebDriverException
 from selenium.webdriver import ActionChains
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
 
+from answer_cache import AnswerCache
+from browser import BROWSER_PROFILE, BROWSER_USER_DATA_DIR, BROWSER_CACHE_DIR, build_options, apply_resource_blocking
+from cookies import CookieStore, restore_one_by_one
+from elements import ChallengeElements, refresh_on_stale
+from hearts import HeartTracker
+from memory import MemoryWatchdog, TAB
+from metrics import Metrics, timed
+from network import CHALLENGE_SOURCE, NetworkChallengeSource
+from pacing import Pacer
+from persistence import AnswerWriter
+from scheduler import ModeScheduler, PRACTICE, SUPER_PRACTICE, TARGET_PRACTICE
+from status import Status, ClickUnavailable, STATUS_SINK, AWAIT_INPUT, WAITING, DORMANT
+from tracing import TraceRecorder
+from extraction import CHALLENGE_INFO_SCRIPT, EXTRACTION_MODE
+from waits import wait_until, wait_for_title, wait_for_option_selected
+from wordbank import WordBank
 from models import *
 
-AWAIT_INPUT = "yellow"
-AWAIT_CLICK = "orange"
-WAITING = "aqua"
-DORMANT = "white"
-COOKIES_PATH = 'cookies.pkl'
+COOKIES_PATH = 'cookies.json'
+# Seconds the status overlay shows PREVIEW before anything starts, 0 skips it
+PREVIEW_DELAY = float(os.environ.get('PREVIEW_DELAY', 3))
+
+CHALLENGE_COLOR = 'cadetblue'
+WORD_BANK_CLICK_PAUSE = float(os.environ.get('WORD_BANK_CLICK_PAUSE', .05))
+
+ANSWER_OUTCOME_SCRIPT = """
+const blame = document.querySelector('[data-test~="blame"]');
+if (!blame) return null;
+const test = blame.getAttribute('data-test');
+return test.includes('blame-correct') ? true : test.includes('blame-incorrect') ? false : null;
+"""
 
 NEED_ANSWER_COLOR = 'rgb(250, 129, 49)'
 OKAY_ANSWER_COLOR = 'rgba(121, 185, 51, 0.9)'
@@ -41,122 +61,170 @@ def wrap_in_challenge_color(color):
     return decorator
 
 
-class Status:
-    _WIDTH = 350
-    _HEIGHT = 55
-    _CLICK_STATUS = " (Click ME to continue)"
-
-    def __init__(self, additional_status_proccessing=None):
-        self._status = ""
-        self._color = ""
-        self._clicked = False
-        self._additional_status_proccessing = additional_status_proccessing
-
-        self._root = tk.Tk()
-        self._root.withdraw()
-
-        self._status_window = tk.Toplevel(self._root)
-        self._status_window.title("-")
-        self._status_window.geometry(f"{self._WIDTH}x{self._HEIGHT}")
-        self._status_window.attributes("-topmost", True)
-        self._status_window.attributes('-alpha', 0.3)
-        self._status_window.overrideredirect(True)
-
-        screen_width = self._root.winfo_screenwidth()
-        self._status_window.geometry(f"+{screen_width - self._WIDTH}+0")
-
-        # Label to display status
-        self._status_label = tk.Label(self._status_window, textvariable=self._status, wraplength=self._WIDTH - 10)
-        self._status_label.place(relx=0.5, rely=0.5, anchor='center')
-        self._status_window.bind('<Button-1>', self._on_click)
-
-        atexit.register(self._exit)
-        self.color = DORMANT
-
-    def _on_click(self, event):
-        self._clicked = True
-
-    @property
-    def color(self):
-        return self._color
-
-    @property
-    def status(self):
-        return self._status
-
-    @status.setter
-    def status(self, value):
-        self._status = value
-        if self._additional_status_proccessing is not None:
-            self._status = self._additional_status_proccessing(self._status)
-
-        self._status_label.config(text=self._status)
-        self._status_window.update()
-
-    @color.setter
-    def color(self, value):
-        self._color = value
-        self._status_window.config(bg=self._color)
-        self._status_window.update()
-
-    @staticmethod
-    def _focus():
-        pyautogui.hotkey('alt', 'tab')
-
-    def wait_to_be_clicked(self, after=None):
-        self._clicked = False
-        old_color = self.color
-        self.color = AWAIT_CLICK
-        self.status += self._CLICK_STATUS
-
-        while not self._clicked:
-            self._root.update()
-
-        self.color = old_color
-        self.status = self.status[:-len(self._CLICK_STATUS)]
-        self._clicked = False
-        self._focus()
-        if after is not None:
-            after()
-
-    def _exit(self):
-        self._root.destroy()
-
-
 class Duolingo:
-    def __init__(self):
-        self._hearts = -1
-        self.status = Status(self.additional_status_proccessing)
-
-        self.status.status = "PREVIEW"
-        time.sleep(3)
+    def __init__(self, status_sink=STATUS_SINK, cookies_path=COOKIES_PATH, answer_broadcast=None,
+                 browser_profile=BROWSER_PROFILE, user_data_dir=BROWSER_USER_DATA_DIR,
+                 challenge_source=CHALLENGE_SOURCE, preview_delay=PREVIEW_DELAY, browser_cache_dir=BROWSER_CACHE_DIR):
+        self.cookies_path = cookies_path
+        self.cookies = CookieStore(cookies_path)
+        self.user_data_dir = user_data_dir
+        # The live browser and the supervisor's standby run at the same time, each needs its own cache
+        self.browser_cache_dirs = [os.path.join(browser_cache_dir, slot) for slot in ('a', 'b')]
+        self.browser_profile = browser_profile
+        self.lean = browser_profile == 'lean'
+        self.metrics = Metrics()
+        atexit.register(self.metrics.export)
+        self.hearts = HeartTracker()
+        self.elements = ChallengeElements()
+        self.trace = TraceRecorder()
+        self.watchdog = MemoryWatchdog()
+        self.pacer = Pacer()
+        self.network = NetworkChallengeSource() if challenge_source == 'network' else None
+        self.outcomes = Counter()
+        self.last_outcome = None
+        self.asked = 0
+        self.stored_answers_used = 0
+        self._attempt = None
+        self._borrowed = False
+        self.status = Status(self.additional_status_proccessing, status_sink)
+
+        if preview_delay:
+            self.status.status = "PREVIEW"
+            time.sleep(preview_delay)
+
+        self.answer_service = None
+        if answer_service_url := os.environ.get('ANSWER_SERVICE_URL'):
+            from answer_service import AnswerServiceClient
+
+            self.answer_service = AnswerServiceClient(answer_service_url)
+            atexit.register(self.answer_service.close)
+
+        # The database is opened and the answers loaded while the browser launches
+        self.answers = None
+        loader = threading.Thread(target=self._load_answers, args=(answer_broadcast,), name="answer-loader")
+        loader.start()
+        self.writer = AnswerWriter(service=self.answer_service)
+        self.scheduler = ModeScheduler(self)
+        self.metrics.gauge('answer_cache_hit_ratio', lambda: self.answers.hit_rate)
+        self.metrics.gauge('answer_cache_fuzzy_hits', lambda: self.answers.fuzzy_hits)
+        self.metrics.gauge('answer_accuracy', self.accuracy)
+        self.metrics.gauge('heart_refreshes', lambda: self.hearts.refreshes)
+        self.metrics.gauge('element_cache_hit_ratio', lambda: self.elements.hit_rate)
+        self.metrics.gauge('memory_js_heap_bytes', lambda: self.watchdog.heap)
+        self.metrics.gauge('memory_dom_nodes', lambda: self.watchdog.nodes)
+        self.metrics.gauge('memory_rss_bytes', lambda: self.watchdog.rss)
+        for kind in self.watchdog.recycles:
+            self.metrics.gauge(f'memory_recycles_{kind}', lambda kind=kind: self.watchdog.recycles[kind])
+
+        self.notifier = None
+        if webhook := os.environ.get('WEBHOOK_NEED_ANSWER'):
+            from notifier import WebhookNotifier
+
+            self.notifier = WebhookNotifier(webhook)
 
         self.status.status = "Launching Browser..."
 
-        options = Options()
-        options.add_argument("--mute-audio")
-
-        self.driver = webdriver.Chrome(options=options)
+        self.driver = None
+        self.use_driver(self.launch_driver())
+        # Replaced by the supervisor with its warm standby browser
+        self.spare_driver = lambda: None
+
+        atexit.register(self._close_driver)
+
+        loader.join()
+        if self.answers is None:
+            raise RuntimeError("Couldn't load answers")
+
+    def launch_driver(self):
+        in_use = getattr(self.driver, 'cache_dir', None)
+        cache_dir = next(cache_dir for cache_dir in self.browser_cache_dirs if cache_dir != in_use)
+        driver = self.metrics.instrument_driver(webdriver.Chrome(
+            options=build_options(self.browser_profile, self.user_data_dir, performance_log=self.network is not None,
+                                  cache_dir=cache_dir)))
+        driver.cache_dir = cache_dir
+        if self.lean:
+            apply_resource_blocking(driver)
+        return driver
+
+    def use_driver(self, driver):
+        self.driver = driver
+        self.hearts.driver = driver
+        self.pacer.driver = driver
+        self.watchdog.driver = driver
+        if self.network is not None:
+            self.network.driver = driver
+        self.hearts.invalidate()
+        self.elements.invalidate()
+
+    def recycle(self, kind):
+        self.status.status = f"Recycling {kind} to free memory..."
+        with self.metrics.span(f'recycle_{kind}'):
+            if kind == TAB:
+                # Same browser, so the session cookies carry over
+                old_tab = self.driver.current_window_handle
+                self.driver.switch_to.new_window('tab')
+                new_tab = self.driver.current_window_handle
+                self.driver.switch_to.window(old_tab)
+                self.driver.close()
+                self.driver.switch_to.window(new_tab)
+                # Blocking is set per tab
+                if self.lean:
+                    apply_resource_blocking(self.driver)
+                self.hearts.invalidate()
+                self.elements.invalidate()
+                self.redirect("https://www.duolingo.com/learn")
+            else:
+                self.cookies.save_if_changed(self.driver.get_cookies())
+                old_driver = self.driver
+                if spare := self.spare_driver():
+                    self.use_driver(spare)
+                try:
+                    old_driver.quit()
+                except:
+                    pass
+                # Without a spare quit first, a persistent profile stays locked while its browser runs
+                if not spare:
+                    self.use_driver(self.launch_driver())
+                # Cookies are restored before the first navigation, no login needed
+                self.open()
+        self.watchdog.recycled(kind)
+
+    def _close_driver(self):
+        try:
+            self.driver.close()
+        except:
+            pass
 
-        atexit.register(self.driver.close)
+    def _load_answers(self, answer_broadcast):
+        self.metrics.instrument_engine(get_engine())
+        answers = AnswerCache(broadcast=answer_broadcast, service=self.answer_service)
+        self.status.status = f"Loaded answers for {answers.preload()} questions"
+        self.answers = answers
 
     def additional_status_proccessing(self, status: str):
         if status.startswith("❤"):
             status = status.split(" ", 1)[1]
-        return f"❤{self.heart_count} {status}"
+        return f"❤{self.hearts.last} {status}"
 
+    @timed('open')
     def open(self):
         self.status.status = "Opening Duolingo"
-        self.redirect("https://www.duolingo.com")
+        # A persistent profile keeps the session itself
+        cookies = [] if self.user_data_dir else self.cookies.load()
+        restored = False
+        if cookies:
+            self.status.status = f"Restoring {len(cookies)} cookies..."
+            try:
+                # Set before the first navigation, so the page loads logged in without a refresh
+                self.cookies.restore(self.driver, cookies)
+                restored = True
+            except WebDriverException:
+                pass
 
-        if os.path.exists(COOKIES_PATH):
-            self.status.status = "Loading cookies..."
-            with open(COOKIES_PATH, 'rb') as file:
-                cookies = pickle.load(file)
-            for cookie in cookies:
-                self.status.status = f"Adding cookie: {cookie['name']}"
-                self.driver.add_cookie(cookie)
+        self.redirect("https://www.duolingo.com")
 
+        if cookies and not restored:
+            restore_one_by_one(self.driver, cookies)
             self.refresh()
 
         self.status.status = "Opened Duolingo"
@@ -168,24 +236,36 @@ class Duolingo:
         except:
             return ""
 
+    def _wait_for_page(self):
+        try:
+            wait_for_title(self.driver, "Duolingo")
+        except TimeoutException:
+            self.status.status = "Page load timed out"
+
     def refresh(self):
         self.status.status = "Refreshing..."
         self.driver.refresh()
+        self._wait_for_page()
+        self.hearts.invalidate()
+        self.elements.invalidate()
 
-        while "Duolingo" not in self.title:
-            pass
-
-        self.driver.fullscreen_window()
+        self.fullscreen()
 
         self.status.status = "Refreshed!"
 
     def redirect(self, url):
         self.status.status = f"Redirecting..."
         self.driver.get(url)
+        self._wait_for_page()
+        self.hearts.invalidate()
+        self.elements.invalidate()
 
-        while "Duolingo" not in self.title:
-            pass
+        self.fullscreen()
 
+    def fullscreen(self):
+        # The lean profile runs headless at a fixed window size
+        if self.lean:
+            return
         try:
             self.driver.fullscreen_window()
         except:
@@ -204,45 +284,41 @@ class Duolingo:
     def logged_in(self):
         return any(cookie.get('name') == 'jwt_token' for cookie in self.driver.get_cookies())
 
-    def _get_challenge_container(self):
+    def _challenge_element(self, name, resolve):
         challenge_header = self._get_challenge_header_element()
         if challenge_header is None:
+            self.elements.invalidate()
             return None
-        try:
-            return challenge_header.find_element(By.XPATH, '../../..')
-        except (NoSuchElementException, StaleElementReferenceException):
-            return None
+        return self.elements.get(challenge_header, name, resolve)
 
-    def _get_hearts_from_page(self):
+    def _get_challenge_container(self):
         try:
-            return int(self.driver.find_element(by=By.CSS_SELECTOR, value='[src*="hearts"]')
-                       .find_element(by=By.XPATH, value='./following-sibling::span').text)
-        except:
+            return self._challenge_element('root', lambda header: header.find_element(By.XPATH, '../../..'))
+        except (NoSuchElementException, StaleElementReferenceException):
             return None
 
     @property
     def heart_count(self):
-        if (hearts := self._get_hearts_from_page()) is not None:
-            self._hearts = hearts
-            return hearts
-        return self._hearts
+        return self.hearts.count
 
     @property
+    @refresh_on_stale
     def challenge_type(self):
-        return self._get_challenge_container().get_attribute('data-test').rsplit()[-1]
+        return self._challenge_element(
+            'type', lambda header: self._get_challenge_container().get_attribute('data-test').rsplit()[-1])
 
-    def set_challenge_color(self, color: str = 'cadetblue', question_container=None):
+    @refresh_on_stale
+    def set_challenge_color(self, color: str = CHALLENGE_COLOR, question_container=None):
         if question_container is None:
             question_container = self.challenge_container
-        self.driver.execute_script(f"""
-                    let question_container = document.getElementsByClassName("{question_container.get_attribute('class')}")[0];
+        self.driver.execute_script("""
+                    let question_container = arguments[0];
                     question_container.setAttribute('modified', '');
-                    question_container.style.backgroundColor = '{color}';
+                    question_container.style.backgroundColor = arguments[1];
                     question_container.style.borderRadius = '10px';
-                """)
+                """, question_container, color)
 
-    @property
-    def challenge_container(self):
+    def _resolve_challenge_container(self, header):
         root_container = self._get_challenge_container()
         main_container = root_container.find_element(by=By.TAG_NAME, value="div")
         question_container = main_container.find_element(by=By.XPATH, value="./child::*[2]")
@@ -251,6 +327,10 @@ class Duolingo:
 
         return question_container
 
+    @property
+    def challenge_container(self):
+        return self._challenge_element('challenge', self._resolve_challenge_container)
+
     def _get_challenge_header_element(self):
         try:
             return self.driver.find_element(By.CSS_SELECTOR, '[data-test="challenge-header"]')
@@ -266,19 +346,20 @@ class Duolingo:
 
     @property
     def in_practice(self):
-        return self._get_challenge_container() is not None and not (self._get_hearts_from_page() == 0)
+        return self._get_challenge_container() is not None and not (self.hearts.on_page() == 0)
 
     def _get_child(self, element, index):
         return element.find_element(By.XPATH, f'./child::*[{index + 1}]')
 
     @property
     def question_container(self):
-        return self._get_child(self.challenge_container, 0)
+        return self._challenge_element('question', lambda header: self._get_child(self.challenge_container, 0))
 
     @property
     def answer_container(self):
-        return self._get_child(self.challenge_container, 1)
+        return self._challenge_element('answer', lambda header: self._get_child(self.challenge_container, 1))
 
+    @timed('login')
     def login(self):
         if self.logged_in:
             self._login()
@@ -292,14 +373,13 @@ class Duolingo:
         self.status.status = "Please login to Duolingo"
         self.status.color = AWAIT_INPUT
 
-        while not self.logged_in:
-            time.sleep(1)
+        wait_until(lambda: self.logged_in, timeout=None, interval=1)
         self._login()
 
     def _login(self):
         self.status.status = "Logged in!"
         self.status.color = DORMANT
-        self.driver.fullscreen_window()
+        self.fullscreen()
 
     def accept_consent(self):
         try:
@@ -320,72 +400,66 @@ class Duolingo:
         except NoSuchElementException:
             self.status.status = "Couldn't accept consent"
 
-    def _start_practice(self):
-        if ("https://www.duolingo.com/learn" not in self.driver.current_url and
-                ('https://www.duolingo.com/practice-hub' not in self.driver.current_url or 'practice-hub/' in self.driver.current_url)):
-            try:
-                self.press_next()
-            except:
-                pass
-            if self.heart_count < 1:
-                self.attempt_exit_no_heart()
-            self.status.status = "Double checking practice..."
-            time.sleep(3)
-            if self.in_practice:
-                return True
-            self.status.status = "Navigating to learn page..."
-            if self.check_super():
-                self.redirect("https://www.duolingo.com/practice-hub")
-                return False
-            self.redirect("https://www.duolingo.com/learn")
-
-        self.remove_clips()
+    def leave_session(self):
+        try:
+            self.press_next()
+        except:
+            pass
+        if self.heart_count < 1:
+            self.attempt_exit_no_heart()
 
+    def enter_mode(self, mode):
+        if mode == PRACTICE:
+            return self.enter_practice()
+        if mode == SUPER_PRACTICE:
+            return self.enter_super_practice()
+        if mode == TARGET_PRACTICE:
+            self.redirect("https://www.duolingo.com/practice-hub/target-practice")
+            return True
+        self.redirect("https://www.duolingo.com/lesson/unit/1/level/1")
+        return True
 
-        self.status.status = "Starting practice..."
-        if self.check_super():
-            if "https://www.duolingo.com/practice-hub" in self.driver.current_url:
-                self.status.status = "Starting super practice one moment..."
-                self.status.color = WAITING
-                time.sleep(1)
-                super_practice = self.driver.find_element(By.CSS_SELECTOR, '[data-test="practice-hub-feature-session-cta"]')
-                super_practice.click()
-            else:
-                self.redirect("https://www.duolingo.com/practice-hub/target-practice")
-            return False
-        practice_menu = self.driver.find_element(By.CSS_SELECTOR, '[data-test="hearts-menu"]')
-        hover_action = ActionChains(self.driver).move_to_element(practice_menu)
-        hover_action.perform()
-        self.status.status = "Hovered over practice menu"
+    def enter_practice(self):
+        if "https://www.duolingo.com/learn" not in self.driver.current_url:
+            self.redirect("https://www.duolingo.com/learn")
+        self.remove_clips()
 
         try:
+            practice_menu = self.driver.find_element(By.CSS_SELECTOR, '[data-test="hearts-menu"]')
+            hover_action = ActionChains(self.driver).move_to_element(practice_menu)
+            hover_action.perform()
+            self.status.status = "Hovered over practice menu"
+
             practice_menu_text = self.driver.find_element(By.XPATH, '//*[text()="Practice to earn hearts"]')
             practice_button = practice_menu_text.find_element(By.XPATH, 'ancestor::button')
             practice_button.click()
         except NoSuchElementException:
-            return self._start_practice()
+            return False
+        return True
 
-        return False
+    def enter_super_practice(self):
+        url = self.driver.current_url
+        if 'https://www.duolingo.com/practice-hub' not in url or 'practice-hub/' in url:
+            self.redirect("https://www.duolingo.com/practice-hub")
+        self.remove_clips()
 
-    def start_practice(self):
-        attempt = 0
-        while not self.in_practice:
-            attempt += 1
-            if attempt > 3 or self.heart_count >= 5:
-                self.status.status = "Couldn't start practice, doing a lesson instead..."
-                time.sleep(.1)
-                self.status.color = DORMANT
-                self.redirect("https://www.duolingo.com/lesson/unit/1/level/1")
-            try:
-                if attempt > 4 or self.heart_count >= 5 or not self._start_practice():
-                    for i in range(60):
-                        self.status.status = f"Confirming practice... [{attempt}] ({i * .1:.1f}/6)"
-                        self.status.color = WAITING
-                        time.sleep(.1)
-            except:
-                attempt = 0
+        self.status.color = WAITING
+        if not self.pacer.wait(lambda: self.driver.find_elements(
+                By.CSS_SELECTOR, '[data-test="practice-hub-feature-session-cta"]')):
+            return False
+        super_practice = self.driver.find_element(By.CSS_SELECTOR, '[data-test="practice-hub-feature-session-cta"]')
+        super_practice.click()
+        return True
 
-        self.status.status = "Started practice!"
+    def _practice_appeared(self):
+        self.hearts.invalidate()
+        return self.in_practice
+
+    @timed('start_practice')
+    def start_practice(self):
+        if self.in_practice:
+            return
+        self.scheduler.start()
         self.status.color = DORMANT
 
     def _get_text(self, element):
@@ -395,10 +469,14 @@ class Duolingo:
                                                                                               'ruby') and not text.find_elements(
                             By.XPATH, ".//*[@lang]")])
 
+    @timed('fetch_question')
+    @refresh_on_stale
     def fetch_question(self):
         question_container = self.question_container
         return self._get_text(question_container)
 
+    @timed('assist_fetch_options')
+    @refresh_on_stale
     def assist_fetch_options(self):
         choices = self.challenge_container.find_elements(By.CSS_SELECTOR, '[data-test="challenge-choice"]')
         return choices, [
@@ -408,6 +486,8 @@ class Duolingo:
             for choice in choices
         ]
 
+    @timed('select_fetch_options')
+    @refresh_on_stale
     def select_fetch_options(self):
         choices = self.challenge_container.find_elements(By.CSS_SELECTOR, '[data-test="challenge-choice"]')
         return choices, [
@@ -425,6 +505,8 @@ class Duolingo:
         else:
             return self._get_text(text_obj)
 
+    @timed('translate_fetch_parts')
+    @refresh_on_stale
     def translate_fetch_parts(self):
         parts = self.answer_container.find_element(
             By.CSS_SELECTOR, '[data-test="word-bank"]'
@@ -435,8 +517,46 @@ class Duolingo:
             for part in parts
         ]
 
+    def _script_challenge_info(self):
+        try:
+            info = self.driver.execute_script(CHALLENGE_INFO_SCRIPT, CHALLENGE_COLOR)
+        except (JavascriptException, StaleElementReferenceException):
+            return None
+        if info is not None and info["type"] == "challenge-select":
+            info["type"] = "challenge-assist"
+        return info
+
+    def _network_challenge_info(self):
+        try:
+            probe = {"header": self.challenge_header_text, "type": self.challenge_type}
+            if probe["type"] == "challenge-select":
+                probe["type"] = "challenge-assist"
+            # Only the element handles to click, their texts come from the session payload
+            if probe["type"] == "challenge-assist":
+                probe["_options"] = self.challenge_container.find_elements(
+                    By.CSS_SELECTOR, '[data-test="challenge-choice"]')
+            elif probe["type"] == "challenge-translate":
+                probe["_parts"] = self.answer_container.find_element(
+                    By.CSS_SELECTOR, '[data-test="word-bank"]').find_elements(By.TAG_NAME, 'div')
+        except (WebDriverException, AttributeError):
+            # No challenge container yet, or one this probe does not know
+            return None
+        if (challenge := self.network.match(probe)) is None:
+            return None
+        info = {**probe, **challenge}
+        info.setdefault("question", info["header"])
+        return info
+
+    @timed('get_challenge_info')
     def get_challenge_info(self):
         self.status.status = "Getting challenge info..."
+        if self.network is not None and (info := self._network_challenge_info()) is not None:
+            self.status.status = "Got challenge info!"
+            return info
+        if EXTRACTION_MODE == 'script' and (info := self._script_challenge_info()) is not None:
+            self.status.status = "Got challenge info!"
+            return info
+
         info = {
             "header": self.challenge_header_text,
             "type": self.challenge_type,
@@ -464,15 +584,11 @@ class Duolingo:
         self.status.color = AWAIT_INPUT
 
         if info["type"] == "challenge-assist":
-            options = info["_options"]
-
-            while True:
-                for i, option in enumerate(options):
-                    if option.get_attribute('aria-checked') == 'true':
-                        self.status.status = f"User chose answer {i + 1}!"
-                        self.status.color = DORMANT
-                        time.sleep(1)
-                        return QuestionAnswer(question=info["question"], answer=info["options"][i])
+            i = wait_for_option_selected(self.driver, info["_options"])
+            self.status.status = f"User chose answer {i + 1}!"
+            self.status.color = DORMANT
+            self.pacer.human_delay()
+            return QuestionAnswer(question=info["question"], answer=info["options"][i])
         elif info["type"] == "challenge-translate":
             self.status.wait_to_be_clicked()
 
@@ -484,19 +600,59 @@ class Duolingo:
 
             return QuestionAnswer(question=info["question"], answer=answer)
 
+    @timed('press_next')
     def press_next(self):
         self.status.status = "Continuing..."
         self.status.color = WAITING
+        self.pacer.mark_challenge()
         try:
             next_button = self.driver.find_element(By.CSS_SELECTOR, '[data-test="player-next"]')
             next_button.click()
-            time.sleep(1)
+            self.pacer.wait_for_continue()
+            self._record_outcome()
             next_button.click()
         except:
             pass
+        self._attempt = None
+        self._borrowed = False
+        self.elements.invalidate()
+        if self.network is not None:
+            self.network.advance()
+        self.pacer.wait_for_next_challenge()
+        self.hearts.invalidate()
         self.status.status = "Dormant"
         self.status.color = DORMANT
 
+    def _record_outcome(self):
+        try:
+            self.last_outcome = self.driver.execute_script(ANSWER_OUTCOME_SCRIPT)
+        except WebDriverException:
+            self.last_outcome = None
+        if self.last_outcome is None or self._attempt is None:
+            return
+        self._apply_outcome(self.last_outcome)
+
+    def _apply_outcome(self, correct):
+        self.outcomes[correct] += 1
+        if self._borrowed:
+            # A similar question's answer never collects outcomes for it, it is kept under this question once right
+            if not correct:
+                return
+            self._attempt = self.answers.add(self._attempt)
+            self._borrowed = False
+            self.writer.save(self._attempt.question, self._attempt.answer)
+        self.answers.record(self._attempt, correct)
+        self.writer.record(self._attempt.question, self._attempt.answer, correct)
+
+    def _use_answer(self, info, answer):
+        self.stored_answers_used += 1
+        self._borrowed = answer.question_key != normalize_question(info["question"])
+        self._attempt = QuestionAnswer(question=info["question"], answer=answer.answer) if self._borrowed else answer
+
+    def accuracy(self):
+        attempts = self.outcomes[True] + self.outcomes[False]
+        return self.outcomes[True] / attempts if attempts else 0.0
+
     def press_skip(self):
         self.status.status = "Skipping..."
         try:
@@ -504,6 +660,8 @@ class Duolingo:
             skip_button.click()
         except:
             pass
+        self.hearts.invalidate()
+        self.elements.invalidate()
         self.status.status = "Skipped!"
 
     def remove_clips(self):
@@ -528,38 +686,55 @@ class Duolingo:
         self.status.status = "Super found!"
         return super_button
 
+    @timed('need_new_answer')
     def _need_new_answer(self, info):
-        if (webhook := os.environ.get('WEBHOOK_NEED_ANSWER')) is not None:
-            requests.get(webhook)
+        if self.notifier is not None:
+            self.notifier.notify(info["question"], info["type"])
+        if not self.status.interactive:
+            self.status.status = "No answer known and no one to ask, skipping"
+            return False
+        self.asked += 1
         answer = self.get_answer(info)
-        if answer is None:
+        # An empty answer area would be stored as an answer that solves with zero clicks
+        if answer is None or not answer.answer.strip():
+            self.status.status = "No answer given"
             return False
         self.status.status = f"Answer saved: {answer.answer}"
-        with Session.begin() as session:
-            session.add(answer)
-            session.commit()
-        time.sleep(1)
+        self._attempt = self.answers.add(answer)
+        self.trace.learned(answer.answer)
+        self.writer.save(answer.question, answer.answer)
+        self.pacer.human_delay()
         return True
 
-    def try_answer(self, session, info, answer):
+    @timed('try_answer')
+    def try_answer(self, info, answer):
         if info["type"] == "challenge-assist":
+            # Answers of similar questions need not be among this challenge's options
+            if answer.answer not in info["options"]:
+                self.trace.tried(answer.answer, False)
+                return 0
             index = info["options"].index(answer.answer)
             info['_options'][index].click()
+            self._use_answer(info, answer)
+            self.trace.tried(answer.answer, True)
         elif info["type"] == "challenge-translate":
-            text = answer.answer
-            used = []
-            while text:
-                for i, part in sorted(enumerate(info["parts"]), key=lambda x: len(x[1]), reverse=True):
-                    if i not in used and text.startswith(part):
-                        text = text[len(part):].strip()
-                        info["_parts"][i].click()
-                        time.sleep(.2)
-                        used.append(i)
-                        break
-                else:
-                    return 0
+            if "_word_bank" not in info:
+                info["_word_bank"] = WordBank(info["parts"])
+            if (indices := info["_word_bank"].segment(answer.answer)) is None:
+                self.trace.tried(answer.answer, False)
+                return 0
+            self.click_all([info["_parts"][i] for i in indices])
+            self._use_answer(info, answer)
+            self.trace.tried(answer.answer, True)
         return True
 
+    def click_all(self, elements):
+        # One W3C actions command for the whole sequence, paced inside the browser
+        actions = ActionChains(self.driver)
+        for element in elements:
+            actions.click(element).pause(WORD_BANK_CLICK_PAUSE)
+        actions.perform()
+
     def attempt_exit_no_heart(self):
         try:
             self.driver.find_element(By.XPATH,
@@ -571,15 +746,18 @@ class Duolingo:
                                      '[data-test="notification-drawer-no-thanks-button"]').click()
         except:
             pass
+        self.hearts.invalidate()
 
+    @timed('solve_challenge')
     def solve_challenge(self, info):
         if not info.get('question', 1):
             self.status.status = "ERROR, couldn't get question!"
             self.set_challenge_color(NEED_ANSWER_COLOR)
             return False
 
-        if self._get_hearts_from_page() is not None:
+        if self.hearts.on_page() is not None:
             self.status.status = "LESSON MODE"
+            self.trace.note("lesson", True)
 
             if info["type"] == "challenge-listenTap":
                 self.press_skip()
@@ -593,44 +771,43 @@ class Duolingo:
             self.attempt_exit_no_heart()
             return True
 
-        with Session() as session:
-            if info["type"] in ["challenge-assist", "challenge-translate"]:
-                answers = session.query(QuestionAnswer).filter(QuestionAnswer.question == info["question"]).all()
-                if len(answers) < 1:
-                    session.close()
-                    return self._need_new_answer(info)
-            elif info["type"] == "challenge-listenTap":
-                self.press_skip()
-                return True
-            else:
-                return False
-
-            self.set_challenge_color(OKAY_ANSWER_COLOR)
+        if info["type"] in ["challenge-assist", "challenge-translate"]:
+            answers = self.answers.get(info["question"])
+            if len(answers) < 1:
+                return self._need_new_answer(info)
+        elif info["type"] == "challenge-listenTap":
+            self.press_skip()
+            return True
+        else:
+            return False
 
-            for answer in answers:
-                result = self.try_answer(session, info, answer)
-                if type(result) == bool:
-                    return result
+        self.set_challenge_color(OKAY_ANSWER_COLOR)
 
-            return self._need_new_answer(info)
+        for answer in answers:
+            result = self.try_answer(info, answer)
+            if type(result) == bool:
+                return result
 
+        return self._need_new_answer(info)
 
-if __name__ == "__main__":
-    duolingo = Duolingo()
 
+def prepare(duolingo):
     duolingo.open()
 
     duolingo.accept_cookies()
     duolingo.login()
     duolingo.accept_consent()
 
+
+def practice(duolingo, on_challenge=None):
     while duolingo.logged_in:
-        with open(COOKIES_PATH, 'wb') as file:
-            pickle.dump(duolingo.driver.get_cookies(), file)
+        duolingo.cookies.save_if_changed(duolingo.driver.get_cookies())
 
         duolingo.start_practice()
 
         while duolingo.in_practice:
+            duolingo.metrics.start_challenge()
+            duolingo.trace.start()
             try:
                 temp_info = duolingo.get_challenge_info()
             except:
@@ -638,9 +815,27 @@ if __name__ == "__main__":
             print(temp_info)
 
             try:
-                if not duolingo.solve_challenge(temp_info):
-                    duolingo.status.wait_to_be_clicked()
+                solved = duolingo.solve_challenge(temp_info)
+                if not solved:
+                    try:
+                        duolingo.status.wait_to_be_clicked()
+                    except ClickUnavailable:
+                        duolingo.press_skip()
                 duolingo.press_next()
-                time.sleep(2)
+                challenge = duolingo.metrics.end_challenge(temp_info["type"], solved, duolingo.last_outcome,
+                                                           duolingo.answers.accuracy(temp_info["question"]))
+                duolingo.trace.finish(temp_info, solved, duolingo.last_outcome, challenge)
+                duolingo.scheduler.record(solved)
+                if on_challenge is not None:
+                    on_challenge(temp_info, solved)
+                # Between two challenges is the one point a page can be thrown away
+                if recycle := duolingo.watchdog.check():
+                    duolingo.recycle(recycle)
             except ElementClickInterceptedException:
-                pass
\ No newline at end of file
+                pass
+
+
+if __name__ == "__main__":
+    from supervisor import Supervisor
+
+    Supervisor(Duolingo(), prepare, practice).run()
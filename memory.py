@@ -0,0 +1,86 @@
+import os
+import time
+
+import psutil
+from selenium.common import WebDriverException
+
+# Seconds between two memory samples, 0 disables the watchdog
+MEMORY_SAMPLE_INTERVAL = float(os.environ.get('MEMORY_SAMPLE_INTERVAL', 60))
+# Watermarks, 0 disables one. Page level ones recycle the tab, RSS recycles the whole browser
+MEMORY_HEAP_LIMIT_MB = float(os.environ.get('MEMORY_HEAP_LIMIT_MB', 1024))
+MEMORY_NODES_LIMIT = int(os.environ.get('MEMORY_NODES_LIMIT', 200000))
+MEMORY_RSS_LIMIT_MB = float(os.environ.get('MEMORY_RSS_LIMIT_MB', 4096))
+
+TAB = 'tab'
+BROWSER = 'browser'
+MB = 1024 * 1024
+
+
+def process_tree_rss(pid):
+    try:
+        process = psutil.Process(pid)
+        rss = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return rss
+    except psutil.Error:
+        return None
+
+
+class MemoryWatchdog:
+    def __init__(self, driver=None, interval=MEMORY_SAMPLE_INTERVAL, heap_limit=MEMORY_HEAP_LIMIT_MB * MB,
+                 nodes_limit=MEMORY_NODES_LIMIT, rss_limit=MEMORY_RSS_LIMIT_MB * MB):
+        self.driver = driver
+        self.interval = interval
+        self.heap_limit = heap_limit
+        self.nodes_limit = nodes_limit
+        self.rss_limit = rss_limit
+
+        self.heap = 0
+        self.nodes = 0
+        self.rss = 0
+        self.samples = 0
+        self.recycles = {TAB: 0, BROWSER: 0}
+        self._sampled = time.monotonic()
+
+    def sample(self):
+        self._sampled = time.monotonic()
+        try:
+            # Enabled per page, a recycled tab needs it again
+            self.driver.execute_cdp_cmd('Performance.enable', {})
+            metrics = {metric['name']: metric['value']
+                       for metric in self.driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']}
+        except WebDriverException:
+            return False
+        self.heap = metrics.get('JSHeapUsedSize', 0)
+        self.nodes = metrics.get('Nodes', 0)
+
+        try:
+            pid = self.driver.service.process.pid
+        except AttributeError:
+            pid = None
+        # chromedriver's process tree is the browser and its renderers
+        self.rss = (process_tree_rss(pid) if pid is not None else None) or 0
+        self.samples += 1
+        return True
+
+    def check(self):
+        if not self.interval or time.monotonic() - self._sampled < self.interval:
+            return None
+        if not self.sample():
+            return None
+
+        if self.rss_limit and self.rss > self.rss_limit:
+            return BROWSER
+        if self.heap_limit and self.heap > self.heap_limit:
+            return TAB
+        if self.nodes_limit and self.nodes > self.nodes_limit:
+            return TAB
+        return None
+
+    def recycled(self, kind):
+        self.recycles[kind] += 1
+        self.heap = self.nodes = self.rss = 0
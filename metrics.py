@@ -0,0 +1,231 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque, Counter
+from contextlib import contextmanager
+from functools import wraps
+
+METRICS_JSONL_PATH = os.environ.get('METRICS_JSONL_PATH', 'metrics.jsonl')
+METRICS_PROMETHEUS_PATH = os.environ.get('METRICS_PROMETHEUS_PATH', 'metrics.prom')
+# Seconds between rewrites of the Prometheus file
+METRICS_EXPORT_INTERVAL = float(os.environ.get('METRICS_EXPORT_INTERVAL', 30))
+# Samples kept per phase / challenge type for percentiles
+METRICS_WINDOW = 1000
+
+
+def timed(name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.span(name):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Phase:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.webdriver_commands = 0
+        self.db_queries = 0
+        self.samples = deque(maxlen=METRICS_WINDOW)
+
+    def record(self, duration, webdriver_commands, db_queries):
+        self.count += 1
+        self.total += duration
+        self.webdriver_commands += webdriver_commands
+        self.db_queries += db_queries
+        self.samples.append(duration)
+
+
+class Metrics:
+    def __init__(self, jsonl_path=METRICS_JSONL_PATH, prometheus_path=METRICS_PROMETHEUS_PATH,
+                 export_interval=METRICS_EXPORT_INTERVAL):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.export_interval = export_interval
+
+        self.started = time.time()
+        self.webdriver_commands = 0
+        self.db_queries = 0
+        self.phases = defaultdict(Phase)
+        self.challenges = Counter()
+        self.challenge_samples = defaultdict(lambda: deque(maxlen=METRICS_WINDOW))
+        self.gauges = {}
+
+        # Only the automation thread's queries are attributed to phases
+        self._thread = threading.get_ident()
+        self._thread_db_queries = 0
+        self._challenge = None
+        self._exported = time.monotonic()
+
+    def gauge(self, name, read):
+        self.gauges[name] = read
+
+    def instrument_driver(self, driver):
+        execute = driver.execute
+
+        def counted_execute(driver_command, params=None):
+            self.webdriver_commands += 1
+            return execute(driver_command, params)
+
+        driver.execute = counted_execute
+        return driver
+
+    def instrument_engine(self, engine):
+        from sqlalchemy import event
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def count_query(*args):
+            self.db_queries += 1
+            if threading.get_ident() == self._thread:
+                self._thread_db_queries += 1
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        webdriver_commands = self.webdriver_commands
+        db_queries = self._thread_db_queries
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            webdriver_commands = self.webdriver_commands - webdriver_commands
+            db_queries = self._thread_db_queries - db_queries
+            self.phases[name].record(duration, webdriver_commands, db_queries)
+            if self._challenge is not None:
+                self._challenge["spans"].append([name, round(duration, 6), webdriver_commands, db_queries])
+
+    def start_challenge(self):
+        self._challenge = {
+            "start": time.perf_counter(),
+            "webdriver_commands": self.webdriver_commands,
+            "db_queries": self._thread_db_queries,
+            "spans": [],
+        }
+
+    def end_challenge(self, challenge_type, solved, correct=None, question_accuracy=None):
+        if (challenge := self._challenge) is None:
+            return None
+        self._challenge = None
+
+        duration = time.perf_counter() - challenge["start"]
+        challenge["duration"] = round(duration, 6)
+        self.challenges[challenge_type] += 1
+        self.challenge_samples[challenge_type].append(duration)
+
+        if self.jsonl_path:
+            record = {
+                "time": time.time(),
+                "kind": "challenge",
+                "type": challenge_type,
+                "solved": bool(solved),
+                "correct": correct,
+                "question_accuracy": question_accuracy,
+                "duration": round(duration, 6),
+                "webdriver_commands": self.webdriver_commands - challenge["webdriver_commands"],
+                "db_queries": self._thread_db_queries - challenge["db_queries"],
+                "spans": challenge["spans"],
+            }
+            self._append(record)
+
+        if time.monotonic() - self._exported >= self.export_interval:
+            self.export()
+        return challenge
+
+    def _append(self, record):
+        with open(self.jsonl_path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(record) + "\n")
+
+    @property
+    def challenges_per_hour(self):
+        return sum(self.challenges.values()) / max(time.time() - self.started, 1) * 3600
+
+    def summary(self):
+        return {
+            "challenges_per_hour": self.challenges_per_hour,
+            "webdriver_commands": self.webdriver_commands,
+            "db_queries": self.db_queries,
+            "phases": {
+                name: {
+                    "count": phase.count,
+                    "p50": percentile(phase.samples, .5),
+                    "p95": percentile(phase.samples, .95),
+                    "webdriver_commands": phase.webdriver_commands,
+                    "db_queries": phase.db_queries,
+                }
+                for name, phase in self.phases.items()
+            },
+            "challenges": {
+                challenge_type: {
+                    "count": count,
+                    "p50": percentile(self.challenge_samples[challenge_type], .5),
+                    "p95": percentile(self.challenge_samples[challenge_type], .95),
+                }
+                for challenge_type, count in self.challenges.items()
+            },
+            **{name: read() for name, read in self.gauges.items()},
+        }
+
+    def prometheus(self):
+        lines = [
+            "# TYPE duolingo_phase_seconds summary",
+        ]
+        for name, phase in self.phases.items():
+            for quantile in (.5, .95):
+                lines.append(f'duolingo_phase_seconds{{phase="{name}",quantile="{quantile}"}} '
+                             f'{percentile(phase.samples, quantile):.6f}')
+            lines.append(f'duolingo_phase_seconds_sum{{phase="{name}"}} {phase.total:.6f}')
+            lines.append(f'duolingo_phase_seconds_count{{phase="{name}"}} {phase.count}')
+
+        lines.append("# TYPE duolingo_phase_webdriver_commands_total counter")
+        for name, phase in self.phases.items():
+            lines.append(f'duolingo_phase_webdriver_commands_total{{phase="{name}"}} {phase.webdriver_commands}')
+        lines.append("# TYPE duolingo_phase_db_queries_total counter")
+        for name, phase in self.phases.items():
+            lines.append(f'duolingo_phase_db_queries_total{{phase="{name}"}} {phase.db_queries}')
+
+        lines.append("# TYPE duolingo_challenge_seconds summary")
+        for challenge_type, count in self.challenges.items():
+            samples = self.challenge_samples[challenge_type]
+            for quantile in (.5, .95):
+                lines.append(f'duolingo_challenge_seconds{{type="{challenge_type}",quantile="{quantile}"}} '
+                             f'{percentile(samples, quantile):.6f}')
+            lines.append(f'duolingo_challenge_seconds_count{{type="{challenge_type}"}} {count}')
+
+        lines += [
+            "# TYPE duolingo_challenges_per_hour gauge",
+            f"duolingo_challenges_per_hour {self.challenges_per_hour:.3f}",
+            "# TYPE duolingo_webdriver_commands_total counter",
+            f"duolingo_webdriver_commands_total {self.webdriver_commands}",
+            "# TYPE duolingo_db_queries_total counter",
+            f"duolingo_db_queries_total {self.db_queries}",
+        ]
+        for name, read in self.gauges.items():
+            lines.append(f"# TYPE duolingo_{name} gauge")
+            lines.append(f"duolingo_{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        self._exported = time.monotonic()
+        if self.jsonl_path:
+            # The aggregates go between the per challenge records, told apart by their kind
+            self._append({"time": time.time(), "kind": "summary", **self.summary()})
+        if not self.prometheus_path:
+            return
+        # Written atomically so a textfile collector never reads half a file
+        temporary_path = f"{self.prometheus_path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            file.write(self.prometheus())
+        os.replace(temporary_path, self.prometheus_path)
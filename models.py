@@ -1,6 +1,10 @@
 import os
+import threading
+import unicodedata
+from collections import Counter
 
-from sqlalchemy import create_engine, Column, Integer, String
+from sqlalchemy import create_engine, event, Column, Integer, String, Index, inspect, text, insert, select, bindparam, \
+    case
 
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -9,18 +13,202 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+DATABASE_ECHO = os.environ.get('DATABASE_ECHO', '1') == '1'
+
 Base = declarative_base()
 
-engine = create_engine(os.environ.get('DATABASE_CONNECTION_STRING'), echo=True, pool_pre_ping=True)
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def _enable_wal(connection, record):
+    cursor = connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.close()
+
+
+def normalize_question(question):
+    question = unicodedata.normalize('NFKC', question or '').casefold()
+    question = ''.join(char for char in question if not unicodedata.category(char).startswith('P'))
+    return ' '.join(question.split())
 
 
 class QuestionAnswer(Base):
     __tablename__ = 'question_answers'
+    __table_args__ = (
+        Index('ix_question_answers_question_key', 'question_key'),
+        Index('uq_question_answers_question_key_answer', 'question_key', 'answer', unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     question = Column(String)
+    question_key = Column(String)
     answer = Column(String)
+    successes = Column(Integer, nullable=False, default=0, server_default='0')
+    failures = Column(Integer, nullable=False, default=0, server_default='0')
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('question_key', normalize_question(kwargs.get('question')))
+        kwargs.setdefault('successes', 0)
+        kwargs.setdefault('failures', 0)
+        super().__init__(**kwargs)
+
+    @property
+    def success_rate(self):
+        # Laplace smoothed, so untried answers rank between good and bad ones
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+
+def migrate(bind=None):
+    bind = bind if bind is not None else get_engine()
+    table = QuestionAnswer.__table__
+    inspector = inspect(bind)
+    columns = {column['name'] for column in inspector.get_columns(table.name)}
+    indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+
+    with bind.begin() as connection:
+        if 'question_key' not in columns:
+            connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN question_key VARCHAR'))
+        for column in ('successes', 'failures'):
+            if column not in columns:
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0'))
+
+        missing = connection.execute(select(table.c.id, table.c.question).where(table.c.question_key.is_(None))).all()
+        if missing:
+            connection.execute(
+                table.update().where(table.c.id == bindparam('row_id')).values(question_key=bindparam('row_key')),
+                [{'row_id': row.id, 'row_key': normalize_question(row.question)} for row in missing]
+            )
+
+        if 'uq_question_answers_question_key_answer' not in indexes:
+            # Keep the oldest row of every duplicated (key, answer) pair
+            connection.execute(text(f"""
+                DELETE FROM {table.name} WHERE id NOT IN (
+                    SELECT id FROM (SELECT MIN(id) AS id FROM {table.name} GROUP BY question_key, answer) AS keep
+                )
+            """))
+
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def upsert_answers(session, answers):
+    rows = {}
+    for question, answer in answers:
+        key = normalize_question(question)
+        rows.setdefault((key, answer), {'question': question, 'question_key': key, 'answer': answer})
+    if not rows:
+        return 0
+
+    dialect = session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is not None:
+        statement = dialect_insert(QuestionAnswer).on_conflict_do_nothing(index_elements=['question_key', 'answer'])
+        # Rows the conflict skipped are not returned, executemany rowcount is unreliable across drivers
+        return len(session.execute(statement.returning(QuestionAnswer.id), list(rows.values())).all())
+
+    keys = {key for key, _ in rows}
+    existing = session.execute(
+        select(QuestionAnswer.question_key, QuestionAnswer.answer).where(QuestionAnswer.question_key.in_(keys))
+    ).all()
+    for pair in existing:
+        rows.pop(tuple(pair), None)
+    if rows:
+        session.execute(insert(QuestionAnswer), list(rows.values()))
+    return len(rows)
+
+
+def record_outcomes(session, outcomes):
+    counts = Counter()
+    for question, answer, correct in outcomes:
+        counts[(normalize_question(question), answer, bool(correct))] += 1
+    if not counts:
+        return 0
+
+    table = QuestionAnswer.__table__
+    session.execute(
+        table.update()
+        .where(table.c.question_key == bindparam('row_key'), table.c.answer == bindparam('row_answer'))
+        .values(successes=table.c.successes + bindparam('row_successes'),
+                failures=table.c.failures + bindparam('row_failures')),
+        [
+            {'row_key': key, 'row_answer': answer,
+             'row_successes': count if correct else 0, 'row_failures': 0 if correct else count}
+            for (key, answer, correct), count in counts.items()
+        ]
+    )
+    return len(counts)
+
+
+def merge_counts(session, rows):
+    # Counts from another host are totals, raising to them keeps a repeated import from counting twice
+    counts = {}
+    for question, answer, successes, failures in rows:
+        key = (normalize_question(question), answer)
+        old_successes, old_failures = counts.get(key, (0, 0))
+        counts[key] = (max(old_successes, successes), max(old_failures, failures))
+    counts = {key: pair for key, pair in counts.items() if any(pair)}
+    if not counts:
+        return 0
+
+    table = QuestionAnswer.__table__
+    session.execute(
+        table.update()
+        .where(table.c.question_key == bindparam('row_key'), table.c.answer == bindparam('row_answer'))
+        .values(successes=case((table.c.successes < bindparam('row_successes'), bindparam('row_successes')),
+                               else_=table.c.successes),
+                failures=case((table.c.failures < bindparam('row_failures'), bindparam('row_failures')),
+                              else_=table.c.failures)),
+        [
+            {'row_key': key, 'row_answer': answer, 'row_successes': successes, 'row_failures': failures}
+            for (key, answer), (successes, failures) in counts.items()
+        ]
+    )
+    return len(counts)
+
+
+def get_engine():
+    global _engine
+    if _engine is not None:
+        return _engine
+
+    with _engine_lock:
+        if _engine is None:
+            engine = create_engine(os.environ.get('DATABASE_CONNECTION_STRING'), echo=DATABASE_ECHO, pool_pre_ping=True)
+            if engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:'):
+                # Lets lookups read while the answer writer commits in the background
+                event.listen(engine, 'connect', _enable_wal)
+            # Schema checks run once, on the first query instead of at import
+            Base.metadata.create_all(engine)
+            migrate(engine)
+            _engine = engine
+    return _engine
+
+
+class LazySessionmaker:
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._factory = None
+
+    @property
+    def factory(self):
+        if self._factory is None:
+            self._factory = sessionmaker(bind=get_engine(), **self._kwargs)
+        return self._factory
+
+    def __call__(self, **kwargs):
+        return self.factory(**kwargs)
+
+    def begin(self):
+        return self.factory.begin()
 
 
-Base.metadata.create_all(engine)
-Session = sessionmaker(bind=engine)
+# Answers outlive their session in the in-process answer cache
+Session = LazySessionmaker(expire_on_commit=False)
@@ -0,0 +1,103 @@
+import base64
+import json
+import os
+import re
+
+from selenium.common import WebDriverException
+
+CHALLENGE_SOURCE = os.environ.get('CHALLENGE_SOURCE', 'dom')
+SESSION_URL_PATTERN = re.compile(os.environ.get('SESSION_URL_PATTERN', r'/sessions(\?|$)'))
+
+
+def _choice_text(choice):
+    if isinstance(choice, str):
+        return choice
+    return choice.get('text') or choice.get('phrase') or ''
+
+
+def challenge_info(challenge):
+    challenge_type = challenge.get('type', '')
+    info = {"type": f"challenge-{challenge_type}"}
+
+    if challenge_type in ('assist', 'translate') and challenge.get('prompt'):
+        info["question"] = challenge['prompt']
+
+    if challenge_type in ('assist', 'select'):
+        info["options"] = [_choice_text(choice) for choice in challenge.get('choices', [])]
+        # Same folding get_challenge_info applies to the DOM type
+        info["type"] = "challenge-assist"
+    elif challenge_type == 'translate' and challenge.get('choices'):
+        info["parts"] = [_choice_text(choice) for choice in challenge['choices']]
+
+    return info
+
+
+class NetworkChallengeSource:
+    def __init__(self, driver=None):
+        self.driver = driver
+        self.challenges = []
+        self.sessions = 0
+        self.matches = 0
+        self.mismatches = 0
+        self._cursor = 0
+        self._current = None
+        self._responses = {}
+
+    def load_session(self, payload):
+        self.challenges = [challenge_info(challenge) for challenge in payload.get('challenges', [])]
+        self._cursor = 0
+        self._current = None
+        self.sessions += 1
+
+    def _body(self, request_id):
+        response = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        body = response['body']
+        if response.get('base64Encoded'):
+            body = base64.b64decode(body)
+        return json.loads(body)
+
+    def poll(self):
+        try:
+            entries = self.driver.get_log('performance')
+        except WebDriverException:
+            return
+
+        for entry in entries:
+            message = json.loads(entry['message'])['message']
+            params = message.get('params', {})
+            if message['method'] == 'Network.responseReceived':
+                if SESSION_URL_PATTERN.search(params['response']['url']):
+                    self._responses[params['requestId']] = params['response']['url']
+            elif message['method'] == 'Network.loadingFinished' and params.get('requestId') in self._responses:
+                del self._responses[params['requestId']]
+                try:
+                    self.load_session(self._body(params['requestId']))
+                except (WebDriverException, ValueError, KeyError):
+                    pass
+
+    @staticmethod
+    def _matches(challenge, probe):
+        # The page is only probed for its type and how many choices it shows, the texts come from the payload
+        if challenge["type"] != probe["type"]:
+            return False
+        return all(len(challenge.get(key, [])) == len(probe.get(f"_{key}", []))
+                   for key in ("options", "parts"))
+
+    def match(self, probe):
+        self.poll()
+
+        # Skipped or already solved challenges are passed over until one fits the page
+        for i in range(self._cursor, len(self.challenges)):
+            if self._matches(self.challenges[i], probe):
+                # Reading the same challenge again finds it again, only advance() moves past it
+                self._current = i
+                self.matches += 1
+                return self.challenges[i]
+
+        self.mismatches += 1
+        return None
+
+    def advance(self):
+        if self._current is not None:
+            self._cursor = self._current + 1
+            self._current = None
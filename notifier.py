@@ -0,0 +1,86 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+WEBHOOK_TIMEOUT = float(os.environ.get('WEBHOOK_TIMEOUT', 5))
+WEBHOOK_RETRIES = int(os.environ.get('WEBHOOK_RETRIES', 3))
+WEBHOOK_BACKOFF = float(os.environ.get('WEBHOOK_BACKOFF', .5))
+# The same question is not alerted again within this many seconds
+WEBHOOK_DEDUPE_WINDOW = float(os.environ.get('WEBHOOK_DEDUPE_WINDOW', 60))
+# Minimum number of seconds between two requests to the webhook
+WEBHOOK_MIN_INTERVAL = float(os.environ.get('WEBHOOK_MIN_INTERVAL', 1))
+
+
+class WebhookNotifier:
+    def __init__(self, url, timeout=WEBHOOK_TIMEOUT, retries=WEBHOOK_RETRIES, backoff=WEBHOOK_BACKOFF,
+                 dedupe_window=WEBHOOK_DEDUPE_WINDOW, min_interval=WEBHOOK_MIN_INTERVAL):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.dedupe_window = dedupe_window
+        self.min_interval = min_interval
+
+        self.sent = 0
+        self.failed = 0
+        self.deduplicated = 0
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        self._queue = queue.Queue()
+        self._recent = {}
+        self._last_sent = 0
+
+        self._thread = threading.Thread(target=self._run, name="webhook-notifier", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def notify(self, question, challenge_type):
+        now = time.monotonic()
+        self._recent = {key: at for key, at in self._recent.items() if now - at < self.dedupe_window}
+
+        key = (question, challenge_type)
+        if key in self._recent:
+            self.deduplicated += 1
+            return False
+
+        self._recent[key] = now
+        self._queue.put({"question": question, "type": challenge_type})
+        return True
+
+    def _run(self):
+        while (payload := self._queue.get()) is not None:
+            if (wait := self._last_sent + self.min_interval - time.monotonic()) > 0:
+                time.sleep(wait)
+            self._send(payload)
+            self._last_sent = time.monotonic()
+
+    def _send(self, payload):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                response = self._session.get(self.url, params=payload, timeout=self.timeout)
+            except requests.RequestException:
+                continue
+            # Client errors will not get better by retrying
+            if response.status_code < 500:
+                self.sent += 1
+                return True
+
+        self.failed += 1
+        return False
+
+    def close(self, timeout=5):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+        self._session.close()
@@ -0,0 +1,85 @@
+import os
+import random
+import time
+
+from selenium.common import TimeoutException, WebDriverException
+
+from waits import wait_until
+
+PACING_MIN_DELAY = float(os.environ.get('PACING_MIN_DELAY', .4))
+PACING_JITTER = float(os.environ.get('PACING_JITTER', .3))
+PACING_TIMEOUT = float(os.environ.get('PACING_TIMEOUT', 6))
+PACING_POLL_INTERVAL = float(os.environ.get('PACING_POLL_INTERVAL', .1))
+
+MARK_CHALLENGE_SCRIPT = """
+const header = document.querySelector('[data-test="challenge-header"]');
+if (header) header.setAttribute('data-paced', '');
+"""
+CHALLENGE_CHANGED_SCRIPT = """
+const header = document.querySelector('[data-test="challenge-header"]');
+return !header || !header.hasAttribute('data-paced');
+"""
+CONTINUE_READY_SCRIPT = """
+// Result screens have no challenge and never show a blame banner, the click already moved them on
+const header = document.querySelector('[data-test="challenge-header"]');
+if (!header || !header.hasAttribute('data-paced')) return true;
+const button = document.querySelector('[data-test="player-next"]');
+return !!button && !button.disabled && button.getAttribute('aria-disabled') !== 'true' &&
+    !!document.querySelector('[data-test*="blame"]');
+"""
+
+
+class Pacer:
+    def __init__(self, driver=None, min_delay=PACING_MIN_DELAY, jitter=PACING_JITTER, timeout=PACING_TIMEOUT,
+                 interval=PACING_POLL_INTERVAL):
+        self.driver = driver
+        self.min_delay = min_delay
+        self.jitter = jitter
+        self.timeout = timeout
+        self.interval = interval
+        self.waited = 0.0
+        self.timeouts = 0
+
+    def delay(self):
+        return self.min_delay + random.uniform(0, self.jitter)
+
+    def human_delay(self):
+        time.sleep(self.delay())
+
+    def wait(self, condition, timeout=None):
+        start = time.monotonic()
+        delay = self.delay()
+
+        def ready():
+            try:
+                return condition()
+            except WebDriverException:
+                return False
+
+        try:
+            wait_until(ready, self.timeout if timeout is None else timeout, self.interval)
+            result = True
+        except TimeoutException:
+            self.timeouts += 1
+            result = False
+
+        # Never act faster than a person would, even when the page is ready at once
+        if (remaining := start + delay - time.monotonic()) > 0:
+            time.sleep(remaining)
+        self.waited += time.monotonic() - start
+        return result
+
+    def _script(self, script):
+        return self.driver.execute_script(script)
+
+    def mark_challenge(self):
+        try:
+            self._script(MARK_CHALLENGE_SCRIPT)
+        except WebDriverException:
+            pass
+
+    def wait_for_next_challenge(self, timeout=None):
+        return self.wait(lambda: self._script(CHALLENGE_CHANGED_SCRIPT), timeout)
+
+    def wait_for_continue(self, timeout=None):
+        return self.wait(lambda: self._script(CONTINUE_READY_SCRIPT), timeout)
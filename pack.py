@@ -0,0 +1,180 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import zlib
+from itertools import groupby
+
+from models import *
+
+PACK_MAGIC = b'DLPK'
+PACK_VERSION = 1
+PACK_COMPRESSED = 1
+# magic, version, flags, base id, max id, record count, index offset
+PACK_HEADER = struct.Struct('<4sHHQQIQ')
+PACK_INDEX_ENTRY = struct.Struct('<Q')
+PACK_LENGTH = struct.Struct('<I')
+PACK_MERGE_BATCH = 1000
+
+
+class PackError(Exception):
+    pass
+
+
+def export_pack(path, since_id=0, compress=True):
+    with Session() as session:
+        rows = session.query(QuestionAnswer).filter(QuestionAnswer.id > since_id) \
+            .order_by(QuestionAnswer.question_key, QuestionAnswer.id).all()
+
+    max_id = max((row.id for row in rows), default=since_id)
+    records = []
+    for key, answers in groupby(rows, key=lambda row: row.question_key):
+        payload = json.dumps([[answer.question, answer.answer, answer.successes, answer.failures]
+                              for answer in answers], ensure_ascii=False, separators=(',', ':')).encode()
+        records.append((key.encode(), zlib.compress(payload) if compress else payload))
+    # Binary search compares raw UTF-8 bytes
+    records.sort(key=lambda record: record[0])
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'wb') as file:
+        file.write(b'\0' * PACK_HEADER.size)
+        offsets = []
+        for key, payload in records:
+            offsets.append(file.tell())
+            file.write(PACK_LENGTH.pack(len(key)) + key + PACK_LENGTH.pack(len(payload)) + payload)
+        index_offset = file.tell()
+        for offset in offsets:
+            file.write(PACK_INDEX_ENTRY.pack(offset))
+        file.seek(0)
+        file.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, PACK_COMPRESSED if compress else 0,
+                                    since_id, max_id, len(records), index_offset))
+    os.replace(temporary_path, path)
+    return len(records)
+
+
+class AnswerPack:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < PACK_HEADER.size:
+            raise PackError(f"{path} is not an answer pack")
+        magic, version, self.flags, self.base_id, self.max_id, self.count, self._index_offset = \
+            PACK_HEADER.unpack_from(self._map)
+        if magic != PACK_MAGIC:
+            raise PackError(f"{path} is not an answer pack")
+        if version != PACK_VERSION:
+            raise PackError(f"{path} has unsupported pack version {version}")
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _record_offset(self, i):
+        return PACK_INDEX_ENTRY.unpack_from(self._map, self._index_offset + i * PACK_INDEX_ENTRY.size)[0]
+
+    def _key(self, offset):
+        length, = PACK_LENGTH.unpack_from(self._map, offset)
+        start = offset + PACK_LENGTH.size
+        return self._map[start:start + length], start + length
+
+    def _payload(self, offset):
+        length, = PACK_LENGTH.unpack_from(self._map, offset)
+        payload = self._map[offset + PACK_LENGTH.size:offset + PACK_LENGTH.size + length]
+        if self.flags & PACK_COMPRESSED:
+            payload = zlib.decompress(payload)
+        return json.loads(payload)
+
+    def get(self, question):
+        key = normalize_question(question).encode()
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            found, end = self._key(self._record_offset(middle))
+            if found == key:
+                return self._payload(end)
+            if found < key:
+                low = middle + 1
+            else:
+                high = middle
+        return []
+
+    def __iter__(self):
+        for i in range(self.count):
+            _, end = self._key(self._record_offset(i))
+            yield from self._payload(end)
+
+    def merge(self, batch_size=PACK_MERGE_BATCH):
+        batch = []
+        merged = 0
+        for row in self:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                merged += self._merge_batch(batch)
+                batch = []
+        if batch:
+            merged += self._merge_batch(batch)
+        return merged
+
+    @staticmethod
+    def _merge_batch(batch):
+        with Session.begin() as session:
+            merged = upsert_answers(session, [(question, answer) for question, answer, _, _ in batch])
+            # The success and failure counts rank answers, a host bootstrapped from a pack keeps them
+            merge_counts(session, batch)
+            return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and import compact answer packs")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help="write question_answers into a pack")
+    export.add_argument('path')
+    export.add_argument('--since', type=int, default=0, help="only rows with a larger id (delta pack)")
+    export.add_argument('--since-pack', help="delta against everything an earlier pack contains")
+    export.add_argument('--no-compress', action='store_true')
+
+    merge = commands.add_parser('import', help="merge packs into the database, oldest first")
+    merge.add_argument('paths', nargs='+')
+
+    query = commands.add_parser('query', help="look a question up in a pack")
+    query.add_argument('path')
+    query.add_argument('question')
+
+    info = commands.add_parser('info', help="show a pack's header")
+    info.add_argument('path')
+
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        since = args.since
+        if args.since_pack:
+            base = AnswerPack(args.since_pack)
+            since = base.max_id
+            base.close()
+        count = export_pack(args.path, since, not args.no_compress)
+        print(f"Exported {count} questions to {args.path}")
+    elif args.command == 'import':
+        for path in args.paths:
+            pack = AnswerPack(path)
+            print(f"Merged {pack.merge()} answers from {path}")
+            pack.close()
+    elif args.command == 'query':
+        pack = AnswerPack(args.path)
+        for question, answer, successes, failures in pack.get(args.question):
+            print(f"{answer}\t(+{successes}/-{failures})\t{question}")
+        pack.close()
+    elif args.command == 'info':
+        pack = AnswerPack(args.path)
+        print(f"{args.path}: version {PACK_VERSION}, {pack.count} questions, ids {pack.base_id + 1}..{pack.max_id}, "
+              f"{'compressed' if pack.flags & PACK_COMPRESSED else 'uncompressed'}")
+        pack.close()
+
+
+if __name__ == "__main__":
+    main()
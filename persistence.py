@@ -0,0 +1,117 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+from sqlalchemy.exc import SQLAlchemyError, OperationalError, InterfaceError
+
+from models import *
+
+ANSWER_WRITE_BATCH_SIZE = int(os.environ.get('ANSWER_WRITE_BATCH_SIZE', 100))
+# Seconds a batch may wait for more answers before it is written
+ANSWER_WRITE_INTERVAL = float(os.environ.get('ANSWER_WRITE_INTERVAL', 1))
+ANSWER_WRITE_RETRY_DELAY = 5
+
+
+class AnswerWriter:
+    def __init__(self, batch_size=ANSWER_WRITE_BATCH_SIZE, interval=ANSWER_WRITE_INTERVAL, service=None):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.service = service
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.dropped = 0
+        self.fallbacks = 0
+
+        self._queue = queue.Queue()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name="answer-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def save(self, question, answer):
+        self._queue.put(('answer', question, answer))
+
+    def record(self, question, answer, correct):
+        self._queue.put(('outcome', question, answer, correct))
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                self._closing = True
+                self._queue.task_done()
+                break
+            batch.append(item)
+        return batch
+
+    def _write(self, batch):
+        if self.service is not None:
+            if self.service.push([item[1:] for item in batch if item[0] == 'answer'],
+                                 [item[1:] for item in batch if item[0] == 'outcome']):
+                self.written += len(batch)
+                self.batches += 1
+                return
+            # The service is down, the local database keeps the batch
+            self.fallbacks += 1
+
+        self.written += self._store(batch)
+        self.batches += 1
+
+    def _store(self, batch):
+        answers = [item[1:] for item in batch if item[0] == 'answer']
+        outcomes = [item[1:] for item in batch if item[0] == 'outcome']
+        while True:
+            try:
+                with Session.begin() as session:
+                    # Answers first, an outcome may belong to an answer learned in the same batch
+                    upsert_answers(session, answers)
+                    record_outcomes(session, outcomes)
+                return len(batch)
+            except (OperationalError, InterfaceError):
+                # The database is unreachable, the same batch goes through once it is back
+                self.errors += 1
+                if self._closing:
+                    return 0
+                time.sleep(ANSWER_WRITE_RETRY_DELAY)
+            except SQLAlchemyError:
+                self.errors += 1
+                break
+
+        # Something in the batch itself is rejected, halving it loses only the rows that fail on their own
+        if len(batch) == 1:
+            self.dropped += 1
+            return 0
+        middle = len(batch) // 2
+        return self._store(batch[:middle]) + self._store(batch[middle:])
+
+    def _run(self):
+        while not self._closing:
+            if (item := self._queue.get()) is None:
+                self._queue.task_done()
+                break
+            batch = self._collect(item)
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self, timeout=30):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
@@ -0,0 +1,212 @@
+import argparse
+import os
+import time
+from collections import Counter
+
+# Replays learn into a throwaway store unless pointed at a real database
+REPLAY_DATABASE = os.environ.get('REPLAY_DATABASE', 'sqlite://')
+
+
+class MockElement:
+    def __init__(self, text):
+        self.text = text
+        self.clicks = 0
+
+    def click(self):
+        self.clicks += 1
+
+
+class MockHearts:
+    def __init__(self):
+        self.page = None
+        self.last = 5
+        self.refreshes = 0
+
+    def invalidate(self):
+        pass
+
+    def on_page(self):
+        return self.page
+
+    @property
+    def count(self):
+        return self.last
+
+
+class MockPacer:
+    def human_delay(self):
+        pass
+
+    def mark_challenge(self):
+        pass
+
+
+class MockWriter:
+    def __init__(self):
+        self.saved = 0
+        self.recorded = 0
+
+    def save(self, question, answer):
+        self.saved += 1
+
+    def record(self, question, answer, correct):
+        self.recorded += 1
+
+
+def challenge_info(record):
+    info = dict(record["info"])
+    if "options" in info:
+        info["_options"] = [MockElement(text) for text in info["options"]]
+    if "parts" in info:
+        info["_parts"] = [MockElement(text) for text in info["parts"]]
+    return info
+
+
+def replay_duolingo(answers):
+    from elements import ChallengeElements
+    from main import Duolingo
+    from metrics import Metrics
+    from models import QuestionAnswer
+    from status import Status, NullSink
+    from tracing import TraceRecorder
+
+    class ReplaySink(NullSink):
+        # Recorded answers stand in for the user
+        interactive = True
+
+    class ReplayDuolingo(Duolingo):
+        # Only the state solve_challenge and try_answer touch, nothing that needs a browser
+        def __init__(self):
+            self.answers = answers
+            self.metrics = Metrics(jsonl_path='', prometheus_path='')
+            self.hearts = MockHearts()
+            self.pacer = MockPacer()
+            self.elements = ChallengeElements()
+            self.trace = TraceRecorder(path='')
+            self.writer = MockWriter()
+            self.status = Status(lambda status: status, ReplaySink())
+            self.notifier = None
+            self.network = None
+            self.driver = None
+            self.outcomes = Counter()
+            self.last_outcome = None
+            self.asked = 0
+            self.stored_answers_used = 0
+            self.skipped = 0
+            self._attempt = None
+            self._borrowed = False
+            self._record = None
+
+        def set_challenge_color(self, color=None, question_container=None):
+            pass
+
+        def press_skip(self):
+            self.skipped += 1
+
+        def attempt_exit_no_heart(self):
+            pass
+
+        def click_all(self, elements):
+            for element in elements:
+                element.click()
+
+        def get_answer(self, info):
+            # The answer the user gave when the challenge was recorded
+            if not self._record["learned"] or self._record["answer"] is None:
+                return None
+            return QuestionAnswer(question=info["question"], answer=self._record["answer"])
+
+        def replay(self, record):
+            self._record = record
+            self._attempt = None
+            self._borrowed = False
+            self.trace.start()
+            self.hearts.page = self.hearts.last if record.get("lesson") else None
+
+            info = challenge_info(record)
+            self.metrics.start_challenge()
+            solved = self.solve_challenge(info)
+
+            # Only an answer the recording clicked as well has a known outcome
+            self.last_outcome = None
+            if self._attempt is not None and self._attempt.answer == record["answer"]:
+                self.last_outcome = record["correct"]
+            if self.last_outcome is not None:
+                self._apply_outcome(self.last_outcome)
+            self.metrics.end_challenge(info["type"], solved, self.last_outcome)
+            return solved
+
+    return ReplayDuolingo()
+
+
+class ReplayStats:
+    def __init__(self):
+        self.challenges = 0
+        self.solved = 0
+        self.learned = 0
+        self.agreed = 0
+        self.disagreed = 0
+        self.elapsed = 0.0
+
+    def record(self, duolingo, record, solved, learned):
+        self.challenges += 1
+        self.solved += bool(solved)
+        self.learned += learned
+        if duolingo._attempt is not None and record["answer"] is not None:
+            if duolingo._attempt.answer == record["answer"]:
+                self.agreed += 1
+            else:
+                self.disagreed += 1
+
+    @property
+    def challenges_per_second(self):
+        return self.challenges / self.elapsed if self.elapsed else 0.0
+
+
+def replay(duolingo, records, passes=1):
+    stats = ReplayStats()
+    start = time.perf_counter()
+    for _ in range(passes):
+        for record in records:
+            asked = duolingo.asked
+            solved = duolingo.replay(record)
+            stats.record(duolingo, record, solved, duolingo.asked > asked)
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def report(duolingo, stats):
+    from metrics import percentile
+
+    print(f"{stats.challenges} challenges in {stats.elapsed:.2f}s ({stats.challenges_per_second:.0f}/s)")
+    print(f"solved {stats.solved}, learned {stats.learned}, skipped {duolingo.skipped}")
+    print(f"same answer as recorded {stats.agreed}, different {stats.disagreed}, "
+          f"known correct {duolingo.outcomes[True]}, known wrong {duolingo.outcomes[False]}")
+    print(f"answer cache hit ratio {duolingo.answers.hit_rate:.3f}, fuzzy hits {duolingo.answers.fuzzy_hits}")
+    for name, phase in duolingo.metrics.phases.items():
+        print(f"{name:<22}{phase.count:>8}{percentile(phase.samples, .5) * 1e6:>10.1f} us p50")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded challenges through the solver without a browser")
+    parser.add_argument('traces', nargs='+', help="trace files written by the solver (TRACE_PATH)")
+    parser.add_argument('--database', default=REPLAY_DATABASE,
+                        help="answer store to start from, the default is an empty in-memory one")
+    parser.add_argument('-n', '--passes', type=int, default=1, help="replay the traces this many times")
+    args = parser.parse_args()
+
+    # Read when the engine is first used, which is the preload below
+    os.environ['DATABASE_CONNECTION_STRING'] = args.database
+
+    from answer_cache import AnswerCache
+    from tracing import read_trace
+
+    records = [record for path in args.traces for record in read_trace(path)]
+    answers = AnswerCache()
+    answers.preload()
+    duolingo = replay_duolingo(answers)
+    report(duolingo, replay(duolingo, records, args.passes))
+
+
+if __name__ == "__main__":
+    main()
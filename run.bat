@@ -1,3 +1,4 @@
 :loop
 .venv\Scripts\python.exe main.py
+set PREVIEW_DELAY=0
 goto loop
\ No newline at end of file
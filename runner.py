@@ -0,0 +1,155 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import time
+from collections import Counter
+
+RUNNER_COOKIES_DIR = os.environ.get('RUNNER_COOKIES_DIR', 'cookies')
+RUNNER_REPORT_INTERVAL = float(os.environ.get('RUNNER_REPORT_INTERVAL', 60))
+RUNNER_STATUS_SINK = os.environ.get('RUNNER_STATUS_SINK', 'stdout')
+# Output files every worker writes, with their defaults
+WORKER_PATHS = {
+    'METRICS_JSONL_PATH': 'metrics.jsonl',
+    'METRICS_PROMETHEUS_PATH': 'metrics.prom',
+    'TRACE_PATH': 'trace.jsonl',
+    'STATUS_JSONL_PATH': 'status.jsonl',
+}
+
+
+def worker_path(path, index):
+    if not path:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}-{index}{extension}"
+
+
+def _worker(index, cookies_path, status_sink, inboxes, events):
+    from dotenv import load_dotenv
+
+    # Read when the modules below are imported, so they are set first
+    load_dotenv()
+    for name, default in WORKER_PATHS.items():
+        os.environ[name] = worker_path(os.environ.get(name, default), index)
+
+    from answer_cache import AnswerBroadcast
+    from browser import BROWSER_PROFILE, BROWSER_USER_DATA_DIR, BROWSER_CACHE_DIR
+    from main import Duolingo, prepare, practice
+    from supervisor import Supervisor
+
+    peers = [inbox for i, inbox in enumerate(inboxes) if i != index]
+    # Chrome locks a profile directory, every account gets its own
+    user_data_dir = os.path.join(BROWSER_USER_DATA_DIR, f"account-{index}") if BROWSER_USER_DATA_DIR else None
+    # Concurrent browsers on one disk cache corrupt it
+    cache_dir = os.path.join(BROWSER_CACHE_DIR, f"account-{index}")
+    duolingo = Duolingo(status_sink, cookies_path, AnswerBroadcast(inboxes[index], peers), BROWSER_PROFILE,
+                        user_data_dir, browser_cache_dir=cache_dir)
+    Supervisor(duolingo, prepare, practice).run(lambda info, solved: events.put((index, info["type"], bool(solved))))
+
+
+class WorkerStats:
+    def __init__(self, cookies_path):
+        self.cookies_path = cookies_path
+        self.started = time.monotonic()
+        self.challenges = 0
+        self.solved = 0
+        self.restarts = 0
+        self.types = Counter()
+
+    def record(self, challenge_type, solved):
+        self.challenges += 1
+        self.solved += solved
+        self.types[challenge_type] += 1
+
+    @property
+    def challenges_per_hour(self):
+        return self.challenges / max(time.monotonic() - self.started, 1) * 3600
+
+
+class Runner:
+    def __init__(self, cookie_paths, status_sink=RUNNER_STATUS_SINK, report_interval=RUNNER_REPORT_INTERVAL):
+        # Chrome and Tk state must not be inherited through fork
+        self._context = multiprocessing.get_context('spawn')
+        self.cookie_paths = cookie_paths
+        self.status_sink = status_sink
+        self.report_interval = report_interval
+        self.stats = [WorkerStats(path) for path in cookie_paths]
+
+        self._inboxes = [self._context.Queue() for _ in cookie_paths]
+        self._events = self._context.Queue()
+        self._processes = [None] * len(cookie_paths)
+
+    def _start(self, index):
+        process = self._context.Process(
+            target=_worker, name=f"duolingo-{index}",
+            args=(index, self.cookie_paths[index], self.status_sink, self._inboxes, self._events)
+        )
+        process.start()
+        self._processes[index] = process
+
+    def _supervise(self):
+        for index, process in enumerate(self._processes):
+            if process is None:
+                self._start(index)
+            elif not process.is_alive():
+                # Whatever the in-process supervisor could not recover from
+                self.stats[index].restarts += 1
+                self._start(index)
+
+    def _drain(self, timeout):
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                index, challenge_type, solved = self._events.get(timeout=remaining)
+            except queue.Empty:
+                return
+            self.stats[index].record(challenge_type, solved)
+
+    def report(self):
+        total = 0
+        for index, stats in enumerate(self.stats):
+            total += stats.challenges_per_hour
+            types = ", ".join(f"{name}={count}" for name, count in stats.types.most_common())
+            print(f"[worker {index}] {stats.cookies_path}: {stats.challenges} challenges, {stats.solved} solved, "
+                  f"{stats.challenges_per_hour:.1f}/h, {stats.restarts} restarts ({types})")
+        print(f"[total] {total:.1f} challenges/h across {len(self.stats)} workers")
+
+    def run(self):
+        try:
+            while True:
+                self._supervise()
+                self._drain(self.report_interval)
+                self.report()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for process in self._processes:
+                if process is not None and process.is_alive():
+                    process.terminate()
+            for process in self._processes:
+                if process is not None:
+                    process.join()
+            self.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several Duolingo accounts in parallel with a shared answer store")
+    parser.add_argument('cookies', nargs='*', help="cookie file per account")
+    parser.add_argument('-n', '--workers', type=int, default=0,
+                        help=f"number of accounts when no cookie files are given ({RUNNER_COOKIES_DIR}/account-N.json)")
+    parser.add_argument('--status-sink', default=RUNNER_STATUS_SINK)
+    parser.add_argument('--report-interval', type=float, default=RUNNER_REPORT_INTERVAL)
+    args = parser.parse_args()
+
+    cookie_paths = args.cookies
+    if not cookie_paths:
+        os.makedirs(RUNNER_COOKIES_DIR, exist_ok=True)
+        cookie_paths = [os.path.join(RUNNER_COOKIES_DIR, f"account-{i}.json") for i in range(args.workers)]
+    if not cookie_paths:
+        parser.error("give cookie files or --workers")
+
+    Runner(cookie_paths, args.status_sink, args.report_interval).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import os
+import time
+
+from selenium.common import WebDriverException
+
+PRACTICE = 'practice'
+SUPER_PRACTICE = 'super_practice'
+TARGET_PRACTICE = 'target_practice'
+LESSON = 'lesson'
+# Tie break, and the order untried modes are explored in
+MODES = (PRACTICE, SUPER_PRACTICE, TARGET_PRACTICE, LESSON)
+
+CHOOSING = 'choosing'
+LEAVING = 'leaving'
+ENTERING = 'entering'
+CONFIRMING = 'confirming'
+SOLVING = 'solving'
+
+# Seconds a mode that failed to start is not tried again
+SCHEDULER_UNAVAILABLE_FOR = float(os.environ.get('SCHEDULER_UNAVAILABLE_FOR', 600))
+SCHEDULER_CONFIRM_TIMEOUT = float(os.environ.get('SCHEDULER_CONFIRM_TIMEOUT', 6))
+# Challenges a mode is measured over before its numbers are trusted
+SCHEDULER_EXPLORE_CHALLENGES = int(os.environ.get('SCHEDULER_EXPLORE_CHALLENGES', 20))
+FULL_HEARTS = 5
+
+
+class ModeStats:
+    def __init__(self):
+        self.sessions = 0
+        self.failures = 0
+        self.challenges = 0
+        self.covered = 0
+        self.hearts_spent = 0
+        self.seconds = 0.0
+        self.unavailable_until = 0.0
+
+    @property
+    def challenges_per_hour(self):
+        return self.challenges / self.seconds * 3600 if self.seconds else 0.0
+
+    @property
+    def coverage(self):
+        return self.covered / self.challenges if self.challenges else 0.0
+
+    @property
+    def heart_cost(self):
+        return self.hearts_spent / self.challenges if self.challenges else 0.0
+
+    @property
+    def throughput(self):
+        # Challenges per hour the answer store could solve, discounted by the hearts they burn
+        return self.challenges_per_hour * self.coverage / (1 + max(self.heart_cost, 0))
+
+
+class ModeScheduler:
+    def __init__(self, duolingo, confirm_timeout=SCHEDULER_CONFIRM_TIMEOUT,
+                 unavailable_for=SCHEDULER_UNAVAILABLE_FOR, explore_challenges=SCHEDULER_EXPLORE_CHALLENGES):
+        self.duolingo = duolingo
+        self.confirm_timeout = confirm_timeout
+        self.unavailable_for = unavailable_for
+        self.explore_challenges = explore_challenges
+
+        self.state = CHOOSING
+        self.mode = None
+        self.stats = {mode: ModeStats() for mode in MODES}
+        self.super = None
+
+        self._started = None
+        self._hearts = None
+        self._stored = 0
+
+        for mode, stats in self.stats.items():
+            duolingo.metrics.gauge(f'mode_{mode}_challenges_per_hour', lambda stats=stats: stats.challenges_per_hour)
+            duolingo.metrics.gauge(f'mode_{mode}_coverage', lambda stats=stats: stats.coverage)
+            duolingo.metrics.gauge(f'mode_{mode}_heart_cost', lambda stats=stats: stats.heart_cost)
+
+    def available(self, mode, hearts):
+        if time.monotonic() < self.stats[mode].unavailable_until:
+            return False
+        if mode in (SUPER_PRACTICE, TARGET_PRACTICE):
+            return bool(self.super)
+        if mode == PRACTICE:
+            # Practice to earn hearts is only offered below full hearts, super has unlimited ones
+            return not self.super and hearts < FULL_HEARTS
+        return bool(self.super) or hearts > 0
+
+    def _score(self, mode):
+        stats = self.stats[mode]
+        if stats.challenges < self.explore_challenges:
+            return float('inf')
+        return stats.throughput
+
+    def choose(self):
+        if self.super is None:
+            self.super = bool(self.duolingo.check_super())
+        hearts = self.duolingo.heart_count
+        candidates = [mode for mode in MODES if self.available(mode, hearts)]
+        if len(candidates) > 1 and LESSON in candidates:
+            # Lessons guess and cost hearts, they are only the fallback when nothing else starts
+            candidates.remove(LESSON)
+        if not candidates:
+            # Everything failed recently, retry whatever comes back first
+            return min(MODES, key=lambda mode: self.stats[mode].unavailable_until)
+        return max(candidates, key=self._score)
+
+    def _mark_unavailable(self, mode):
+        stats = self.stats[mode]
+        stats.failures += 1
+        stats.unavailable_until = time.monotonic() + self.unavailable_for
+
+    def start(self):
+        duolingo = self.duolingo
+        if self.state == SOLVING:
+            self.end_session()
+            # A session that ended leaves its result screens behind
+            self.state = LEAVING
+
+        while self.state != SOLVING:
+            if self.state == LEAVING:
+                duolingo.leave_session()
+                self.state = SOLVING if duolingo.pacer.wait(lambda: duolingo.in_practice, timeout=3) else CHOOSING
+                if self.state == SOLVING:
+                    self._begin(self.mode)
+
+            elif self.state == CHOOSING:
+                self.mode = self.choose()
+                self._started = time.monotonic()
+                self._hearts = duolingo.heart_count
+                self.state = ENTERING
+
+            elif self.state == ENTERING:
+                duolingo.status.status = f"Starting {self.mode.replace('_', ' ')}..."
+                try:
+                    entered = duolingo.enter_mode(self.mode)
+                except WebDriverException:
+                    entered = False
+                if entered:
+                    self.state = CONFIRMING
+                else:
+                    self._mark_unavailable(self.mode)
+                    self.state = CHOOSING
+
+            elif self.state == CONFIRMING:
+                duolingo.status.status = f"Confirming {self.mode.replace('_', ' ')}..."
+                if duolingo.pacer.wait(duolingo._practice_appeared, timeout=self.confirm_timeout):
+                    self._begin(self.mode)
+                    self.state = SOLVING
+                else:
+                    self._mark_unavailable(self.mode)
+                    self.state = CHOOSING
+
+        duolingo.status.status = f"Started {self.mode.replace('_', ' ')}!"
+
+    def _begin(self, mode):
+        if self._started is None:
+            self._started = time.monotonic()
+            self._hearts = self.duolingo.heart_count
+        self.stats[mode].sessions += 1
+        self._stored = self.duolingo.stored_answers_used
+
+    def record(self, solved):
+        if self.state != SOLVING:
+            return
+        stats = self.stats[self.mode]
+        stats.challenges += 1
+        # Covered means a stored answer was clicked, not a guess, a skip or the user's answer
+        stats.covered += bool(solved) and self.duolingo.stored_answers_used > self._stored
+        self._stored = self.duolingo.stored_answers_used
+
+    def end_session(self):
+        if self._started is None:
+            return
+        stats = self.stats[self.mode]
+        # Navigation and confirmation count against the mode, they are part of its cost
+        stats.seconds += time.monotonic() - self._started
+        self.duolingo.hearts.invalidate()
+        stats.hearts_spent += self._hearts - self.duolingo.heart_count
+        self._started = None
@@ -0,0 +1,245 @@
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+AWAIT_INPUT = "yellow"
+AWAIT_CLICK = "orange"
+WAITING = "aqua"
+DORMANT = "white"
+
+STATUS_SINK = os.environ.get('STATUS_SINK', 'tk')
+STATUS_JSONL_PATH = os.environ.get('STATUS_JSONL_PATH', 'status.jsonl')
+# How often the sink thread wakes up when no status arrives, e.g. to pump Tk events
+STATUS_IDLE_INTERVAL = .05
+
+
+class ClickUnavailable(Exception):
+    pass
+
+
+class NullSink:
+    # Whether wait_for_click can actually be answered by someone
+    interactive = False
+
+    def open(self):
+        pass
+
+    def show(self, status, color):
+        pass
+
+    def idle(self):
+        pass
+
+    def wait_for_click(self):
+        raise ClickUnavailable(f"{type(self).__name__} cannot be clicked")
+
+    def close(self):
+        pass
+
+
+class StdoutSink(NullSink):
+    def __init__(self, stream=None):
+        self._stream = stream or sys.stdout
+
+    def _write(self, line):
+        self._stream.write(line + "\n")
+        self._stream.flush()
+
+    def show(self, status, color):
+        self._write(f"[{color}] {status}")
+
+    @property
+    def interactive(self):
+        # Without an overlay to click, a line on an interactive stdin confirms instead
+        return sys.stdin is not None and sys.stdin.isatty()
+
+    def wait_for_click(self):
+        if not self.interactive:
+            super().wait_for_click()
+        sys.stdin.readline()
+
+
+class JsonlSink(StdoutSink):
+    def __init__(self, path=STATUS_JSONL_PATH):
+        super().__init__()
+        self._path = path
+
+    def open(self):
+        self._stream = open(self._path, 'a', encoding='utf-8')
+
+    def show(self, status, color):
+        self._write(json.dumps({"time": time.time(), "status": status, "color": color}, ensure_ascii=False))
+
+    def close(self):
+        self._stream.close()
+
+
+class TkSink(NullSink):
+    _WIDTH = 350
+    _HEIGHT = 55
+    interactive = True
+
+    def __init__(self):
+        self._clicked = threading.Event()
+
+    def open(self):
+        import tkinter as tk
+
+        self._root = tk.Tk()
+        self._root.withdraw()
+
+        self._status_window = tk.Toplevel(self._root)
+        self._status_window.title("-")
+        self._status_window.geometry(f"{self._WIDTH}x{self._HEIGHT}")
+        self._status_window.attributes("-topmost", True)
+        self._status_window.attributes('-alpha', 0.3)
+        self._status_window.overrideredirect(True)
+
+        screen_width = self._root.winfo_screenwidth()
+        self._status_window.geometry(f"+{screen_width - self._WIDTH}+0")
+
+        # Label to display status
+        self._status_label = tk.Label(self._status_window, wraplength=self._WIDTH - 10)
+        self._status_label.place(relx=0.5, rely=0.5, anchor='center')
+        self._status_window.bind('<Button-1>', self._on_click)
+
+    def _on_click(self, event):
+        self._clicked.set()
+
+    def show(self, status, color):
+        self._status_label.config(text=status)
+        self._status_window.config(bg=color)
+        self._root.update()
+
+    def idle(self):
+        self._root.update()
+
+    def wait_for_click(self):
+        self._clicked.clear()
+        self._clicked.wait()
+        self._clicked.clear()
+        self._focus()
+
+    @staticmethod
+    def _focus():
+        import pyautogui
+
+        pyautogui.hotkey('alt', 'tab')
+
+    def close(self):
+        self._root.destroy()
+
+
+SINKS = {
+    'null': NullSink,
+    'stdout': StdoutSink,
+    'jsonl': JsonlSink,
+    'tk': TkSink,
+}
+
+
+class Status:
+    _CLICK_STATUS = " (Click ME to continue)"
+
+    def __init__(self, additional_status_proccessing=None, sink=STATUS_SINK):
+        self._status = ""
+        self._color = ""
+        self._additional_status_proccessing = additional_status_proccessing
+        self._sink = SINKS[sink]() if isinstance(sink, str) else sink
+        self._updates = queue.Queue()
+        self._opened = threading.Event()
+        self._error = None
+
+        self._thread = threading.Thread(target=self._run, name="status-sink", daemon=True)
+        self._thread.start()
+        self._opened.wait()
+        if self._error is not None:
+            raise self._error
+
+        atexit.register(self._exit)
+        self.color = DORMANT
+
+    def _run(self):
+        try:
+            self._sink.open()
+        except Exception as e:
+            self._error = e
+            return
+        finally:
+            self._opened.set()
+
+        while True:
+            try:
+                update = self._updates.get(timeout=STATUS_IDLE_INTERVAL)
+            except queue.Empty:
+                self._sink.idle()
+                continue
+
+            # Coalesce everything that piled up while the sink was rendering
+            latest, closing = None, False
+            while True:
+                if update is None:
+                    closing = True
+                else:
+                    latest = update
+                try:
+                    update = self._updates.get_nowait()
+                except queue.Empty:
+                    break
+
+            if latest is not None:
+                self._sink.show(*latest)
+            if closing:
+                break
+
+        self._sink.close()
+
+    def _push(self):
+        self._updates.put((self._status, self._color))
+
+    @property
+    def color(self):
+        return self._color
+
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        self._status = value
+        if self._additional_status_proccessing is not None:
+            self._status = self._additional_status_proccessing(self._status)
+        self._push()
+
+    @color.setter
+    def color(self, value):
+        self._color = value
+        self._push()
+
+    @property
+    def interactive(self):
+        return self._sink.interactive
+
+    def wait_to_be_clicked(self, after=None):
+        old_color = self.color
+        self.color = AWAIT_CLICK
+        self.status += self._CLICK_STATUS
+
+        try:
+            self._sink.wait_for_click()
+        finally:
+            # A sink that cannot be clicked raises, it must not be left showing the click prompt
+            self.color = old_color
+            self.status = self.status[:-len(self._CLICK_STATUS)]
+        if after is not None:
+            after()
+
+    def _exit(self):
+        if self._thread.is_alive():
+            self._updates.put(None)
+            self._thread.join(timeout=5)
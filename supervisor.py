@@ -0,0 +1,168 @@
+import atexit
+import os
+import threading
+import time
+import traceback
+from collections import Counter
+
+from selenium.common import InvalidSessionIdException, NoSuchWindowException, WebDriverException
+
+# Keep a second browser launched so a crashed one is replaced without waiting for Chrome
+SUPERVISOR_STANDBY = os.environ.get('SUPERVISOR_STANDBY', '1') == '1'
+# In place recoveries in a row, without a challenge in between, before the browser is relaunched
+SUPERVISOR_MAX_FAILURES = int(os.environ.get('SUPERVISOR_MAX_FAILURES', 3))
+SUPERVISOR_RETRY_DELAY = float(os.environ.get('SUPERVISOR_RETRY_DELAY', 5))
+
+LEARN_URL = "https://www.duolingo.com/learn"
+HOME_URL = "https://www.duolingo.com"
+
+PAGE = 'page'
+LOGGED_OUT = 'logged_out'
+BROWSER = 'browser'
+
+
+def driver_alive(driver):
+    try:
+        return bool(driver.window_handles)
+    except (InvalidSessionIdException, NoSuchWindowException):
+        return False
+    except WebDriverException as error:
+        message = (error.msg or '').lower()
+        return not any(dead in message for dead in ('disconnected', 'not reachable', 'session deleted'))
+    except Exception:
+        # Connection refused by a chromedriver that is gone
+        return False
+
+
+class Supervisor:
+    def __init__(self, duolingo, prepare, practice, standby=SUPERVISOR_STANDBY, max_failures=SUPERVISOR_MAX_FAILURES,
+                 retry_delay=SUPERVISOR_RETRY_DELAY):
+        # prepare/practice are main's, passed in since main is usually run as __main__
+        self.duolingo = duolingo
+        self.prepare = prepare
+        self.practice = practice
+        # Chrome locks a profile directory, a standby browser could not share it
+        self.standby = standby and not duolingo.user_data_dir
+        self.max_failures = max_failures
+        self.retry_delay = retry_delay
+
+        self.recoveries = Counter()
+        self.last_recovery = 0.0
+        self._failures = 0
+        self._on_challenge = None
+        self._standby_driver = None
+        self._standby_thread = None
+        if self.standby:
+            # Memory recycling swaps in the standby as well
+            duolingo.spare_driver = self._take_standby
+
+        for kind in (PAGE, LOGGED_OUT, BROWSER):
+            duolingo.metrics.gauge(f'recoveries_{kind}', lambda kind=kind: self.recoveries[kind])
+        duolingo.metrics.gauge('last_recovery_seconds', lambda: self.last_recovery)
+        atexit.register(self.close)
+
+    def _launch_standby(self):
+        try:
+            driver = self.duolingo.launch_driver()
+        except Exception:
+            return
+        if not self.duolingo.lean:
+            try:
+                driver.minimize_window()
+            except WebDriverException:
+                pass
+        self._standby_driver = driver
+
+    def _start_standby(self):
+        if not self.standby or self._standby_driver is not None:
+            return
+        if self._standby_thread is not None and self._standby_thread.is_alive():
+            return
+        self._standby_thread = threading.Thread(target=self._launch_standby, name="standby-browser", daemon=True)
+        self._standby_thread.start()
+
+    def _take_standby(self):
+        if self._standby_thread is not None:
+            # A standby still starting up is closer to ready than a new launch
+            self._standby_thread.join()
+        driver, self._standby_driver = self._standby_driver, None
+        if driver is not None and not driver_alive(driver):
+            return None
+        return driver
+
+    def classify(self, error, failed_recovery=None):
+        if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+            return BROWSER
+        if failed_recovery is not None or not driver_alive(self.duolingo.driver):
+            return BROWSER
+        self._failures += 1
+        if self._failures >= self.max_failures:
+            return BROWSER
+        return PAGE
+
+    def relaunch(self):
+        duolingo = self.duolingo
+        duolingo.status.status = "Relaunching browser..."
+        dead = duolingo.driver
+        duolingo.use_driver(self._take_standby() or duolingo.launch_driver())
+        try:
+            dead.quit()
+        except Exception:
+            pass
+        self.prepare(duolingo)
+        self._start_standby()
+
+    def recover(self, kind):
+        duolingo = self.duolingo
+        duolingo.status.status = f"Recovering ({kind})..."
+        start = time.perf_counter()
+        with duolingo.metrics.span(f'recover_{kind}'):
+            if kind == BROWSER:
+                self.relaunch()
+                self._failures = 0
+            elif kind == LOGGED_OUT:
+                duolingo.redirect(HOME_URL)
+                duolingo.login()
+            else:
+                # The live browser is kept, practice restarts from the learn page
+                duolingo.redirect(LEARN_URL)
+        self.last_recovery = time.perf_counter() - start
+        self.recoveries[kind] += 1
+        duolingo.status.status = f"Recovered ({kind}) in {self.last_recovery:.1f}s"
+
+    def _challenge_done(self, info, solved):
+        self._failures = 0
+        # A standby taken by a memory recycle is replaced once the recycled browser has quit
+        self._start_standby()
+        if self._on_challenge is not None:
+            self._on_challenge(info, solved)
+
+    def run(self, on_challenge=None):
+        self._on_challenge = on_challenge
+        self.prepare(self.duolingo)
+        self._start_standby()
+
+        recovery = None
+        while True:
+            try:
+                if recovery is not None:
+                    self.recover(recovery)
+                    recovery = None
+                self.practice(self.duolingo, self._challenge_done)
+                # practice only returns once the session is gone
+                recovery = LOGGED_OUT
+            except Exception as error:
+                traceback.print_exc()
+                if recovery == BROWSER:
+                    time.sleep(self.retry_delay)
+                recovery = self.classify(error, recovery)
+
+    def close(self):
+        if self._standby_thread is not None:
+            self._standby_thread.join()
+        if self._standby_driver is not None:
+            try:
+                self._standby_driver.quit()
+            except Exception:
+                pass
+            self._standby_driver = None
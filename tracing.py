@@ -0,0 +1,76 @@
+import atexit
+import json
+import os
+import time
+
+# Every challenge seen is appended here, empty disables the trace
+TRACE_PATH = os.environ.get('TRACE_PATH', 'trace.jsonl')
+
+
+def trace_info(info):
+    # Element handles cannot be stored, everything the solver read from the page can
+    return {key: value for key, value in info.items() if not key.startswith('_')}
+
+
+def read_trace(path):
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+class TraceRecorder:
+    def __init__(self, path=TRACE_PATH):
+        self.path = path
+        self.records = 0
+        self._file = None
+        self.start()
+
+    def start(self):
+        self._tried = []
+        self._answer = None
+        self._learned = False
+        self._notes = {}
+
+    def tried(self, answer, clicked):
+        self._tried.append([answer, bool(clicked)])
+        if clicked:
+            self._answer = answer
+
+    def learned(self, answer):
+        self._answer = answer
+        self._learned = True
+
+    def note(self, key, value):
+        self._notes[key] = value
+
+    def finish(self, info, solved, correct, challenge=None):
+        if not self.path:
+            return
+
+        record = {
+            "time": time.time(),
+            "info": trace_info(info),
+            "tried": self._tried,
+            "answer": self._answer,
+            "learned": self._learned,
+            "solved": bool(solved),
+            "correct": correct,
+            **self._notes,
+        }
+        if challenge is not None:
+            record["duration"] = challenge["duration"]
+            record["spans"] = challenge["spans"]
+
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+            atexit.register(self.close)
+        # One line per challenge, flushed so a crash loses at most the challenge in progress
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+        self._file.flush()
+        self.records += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
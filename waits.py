@@ -0,0 +1,61 @@
+import os
+import time
+
+from selenium.common import TimeoutException, WebDriverException
+from selenium.webdriver.support.wait import WebDriverWait
+
+POLL_INTERVAL = float(os.environ.get('WAIT_POLL_INTERVAL', .1))
+WAIT_TIMEOUT = float(os.environ.get('WAIT_TIMEOUT', 30))
+# Long waits on the page are split into script calls of this many seconds
+SCRIPT_WAIT_CHUNK = 30
+
+PAGE_TITLE_SCRIPT = "return document.readyState === 'complete' ? document.title : null;"
+
+OPTION_SELECTED_SCRIPT = """
+const [options, timeout, done] = arguments;
+const selected = () => options.findIndex((option) => option.getAttribute('aria-checked') === 'true');
+if (selected() !== -1) return done(selected());
+
+const observer = new MutationObserver(() => {
+    const index = selected();
+    if (index === -1) return;
+    observer.disconnect();
+    clearTimeout(timer);
+    done(index);
+});
+options.forEach((option) => observer.observe(option, {attributes: true, attributeFilter: ['aria-checked']}));
+const timer = setTimeout(() => {
+    observer.disconnect();
+    done(-1);
+}, timeout);
+"""
+
+
+def wait_until(condition, timeout=WAIT_TIMEOUT, interval=POLL_INTERVAL, message=""):
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        if result := condition():
+            return result
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutException(message)
+        time.sleep(interval)
+
+
+def wait_for_title(driver, title, timeout=WAIT_TIMEOUT, interval=POLL_INTERVAL):
+    def loaded(driver):
+        page_title = driver.execute_script(PAGE_TITLE_SCRIPT)
+        return page_title is not None and title in page_title
+
+    return WebDriverWait(driver, timeout, poll_frequency=interval, ignored_exceptions=(WebDriverException,)) \
+        .until(loaded, f"Page title never contained {title!r}")
+
+
+def wait_for_option_selected(driver, options, timeout=None):
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        chunk = SCRIPT_WAIT_CHUNK if deadline is None else min(SCRIPT_WAIT_CHUNK, deadline - time.monotonic())
+        if chunk <= 0:
+            raise TimeoutException("No option was selected")
+        driver.set_script_timeout(chunk + 5)
+        if (index := driver.execute_async_script(OPTION_SELECTED_SCRIPT, options, int(chunk * 1000))) >= 0:
+            return index
@@ -0,0 +1,59 @@
+_END = object()
+
+
+class WordBank:
+    def __init__(self, parts):
+        self._trie = {}
+        self._indices = {}
+        for i, part in enumerate(parts):
+            if not (part := part.strip()):
+                continue
+            self._indices.setdefault(part, []).append(i)
+            node = self._trie
+            for char in part:
+                node = node.setdefault(char, {})
+            node[_END] = part
+
+    def _matches(self, text, position):
+        node = self._trie
+        found = []
+        for char in text[position:]:
+            if (node := node.get(char)) is None:
+                break
+            if _END in node:
+                found.append(node[_END])
+        # Longest parts first, the order the greedy matcher used to try
+        return reversed(found)
+
+    def segment(self, text):
+        tokens = list(self._indices)
+        remaining = {token: len(indices) for token, indices in self._indices.items()}
+        failed = set()
+
+        def solve(position):
+            while position < len(text) and text[position].isspace():
+                position += 1
+            if position == len(text):
+                return []
+
+            state = (position, tuple(remaining[token] for token in tokens))
+            if state in failed:
+                return None
+
+            for part in self._matches(text, position):
+                if not remaining[part]:
+                    continue
+                remaining[part] -= 1
+                rest = solve(position + len(part))
+                remaining[part] += 1
+                if rest is not None:
+                    return [part, *rest]
+
+            failed.add(state)
+            return None
+
+        if (sequence := solve(0)) is None:
+            return None
+
+        available = {token: iter(indices) for token, indices in self._indices.items()}
+        return [next(available[part]) for part in sequence]